@@ -137,6 +137,8 @@ def execute_signals(
     # 获取当前持仓
     positions = trader.get_positions()
     held_symbols = {p["symbol"] for p in positions}
+    # 按代码索引持仓 (倒序构建，同一代码有多条时取第一条)
+    positions_by_symbol = {p["symbol"]: p for p in reversed(positions)}
     
     # 🕵️‍♂️ 检查今日订单（防止重复下单）
     try:
@@ -162,7 +164,7 @@ def execute_signals(
             continue
         
         # 检查是否持有该股票
-        position = next((p for p in positions if p["symbol"] == signal.symbol), None)
+        position = positions_by_symbol.get(signal.symbol)
         if not position:
             results["sell_skipped"].append({
                 "symbol": signal.symbol,
@@ -100,6 +100,10 @@ def run_batch_backtest(symbols, days=730, start_cash=40000.0, use_risk_config=Tr
     except Exception as e:
         raise ImportError(f"无法加载策略 {strategy_class_name} from {strategy_file_path}: {e}")
     
+    # 批量预热缓存，循环内的 fetch_and_update 只需读盘
+    if not offline:
+        history.warm(symbols, days=days)
+    
     for symbol in symbols:
         try:
             # 1. 获取数据
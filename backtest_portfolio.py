@@ -418,6 +418,10 @@ def main():
     all_data = {}
     all_signals = []
     
+    # 批量预热缓存，循环内的 fetch_and_update 只需读盘
+    if not args.offline:
+        history.warm(symbols, days=args.days)
+    
     for symbol in symbols:
         try:
             if args.offline:
@@ -169,24 +169,27 @@ OPTIMIZED_BATCH = [
     "TSLA.US", "AMD.US", "XPEV.US", "LI.US", "CRM.US"
 ]
 
+# 分类 -> 列表 (合并去重的分类在导入时算好一次)
+_WATCHLISTS = {
+    "default": DEFAULT_WATCHLIST,
+    "optimized": OPTIMIZED_BATCH,  # 新增: 优化后的列表
+    "us_tech": US_TECH,
+    "us_ai": US_AI,
+    "us_moat": US_CORE_MOAT,
+    "us_consensus": US_CONSENSUS,  # 新增: 大师共识
+    "hk_tech": HK_TECH,
+    "hk_internet": HK_INTERNET,
+    "cn_adr": CN_ADR,
+    "monitor": MONITOR_STOCKS,
+    "etf": LEVERAGED_ETF,
+    "china": list(set(HK_INTERNET + CN_ADR)),  # 所有中国公司
+    "all": list(set(US_TECH + US_AI + US_CORE_MOAT + US_CONSENSUS + HK_INTERNET + CN_ADR + MONITOR_STOCKS + LEVERAGED_ETF)),
+}
+
+
 def get_watchlist(category: str = "default") -> list:
-    """获取自选股列表"""
-    watchlists = {
-        "default": DEFAULT_WATCHLIST,
-        "optimized": OPTIMIZED_BATCH,  # 新增: 优化后的列表
-        "us_tech": US_TECH,
-        "us_ai": US_AI,
-        "us_moat": US_CORE_MOAT,
-        "us_consensus": US_CONSENSUS,  # 新增: 大师共识
-        "hk_tech": HK_TECH,
-        "hk_internet": HK_INTERNET,
-        "cn_adr": CN_ADR,
-        "monitor": MONITOR_STOCKS,
-        "etf": LEVERAGED_ETF,
-        "china": list(set(HK_INTERNET + CN_ADR)),  # 所有中国公司
-        "all": list(set(US_TECH + US_AI + US_CORE_MOAT + US_CONSENSUS + HK_INTERNET + CN_ADR + MONITOR_STOCKS + LEVERAGED_ETF)),
-    }
-    return watchlists.get(category, DEFAULT_WATCHLIST)
+    """获取自选股列表 (返回共享列表，调用方不要修改)"""
+    return _WATCHLISTS.get(category, DEFAULT_WATCHLIST)
 
 
 def list_categories() -> dict:
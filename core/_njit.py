@@ -0,0 +1,18 @@
+"""
+Numba 可选依赖
+
+安装了 numba 时导出真正的 njit / prange；未安装时 njit 退化为原样返回函数的
+装饰器，prange 退化为 range，数值内核按普通 Python 执行，结果一致。
+"""
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """无 numba 时的占位装饰器，支持 @njit 与 @njit(...) 两种写法"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
@@ -0,0 +1,53 @@
+"""
+智能止损数值内核
+
+安装了 numba 时编译为机器码；未安装时按普通 Python 执行 (见 _njit.py)，
+调用方在无 numba 时应优先使用 NumPy 向量化写法。
+"""
+import math
+
+import numpy as np
+
+from ._njit import njit, HAS_NUMBA
+
+
+@njit(cache=True, fastmath=True)
+def _atr_loop(high, low, close, period):
+    """
+    最近 period 根K线的平均真实波幅 (ATR)
+
+    high/low/close 为等长 float32/float64 数组，长度至少 period + 1；累加用 float64。
+    """
+    n = high.shape[0]
+    total = 0.0
+    for i in range(n - period, n):
+        prev_close = close[i - 1]
+        tr = max(high[i] - low[i], abs(high[i] - prev_close), abs(low[i] - prev_close))
+        total += tr
+    return total / period
+
+
+@njit(cache=True, fastmath=True)
+def _vol_loop(close):
+    """
+    日收益率的年化波动率 (总体标准差 * sqrt(252))
+
+    close 为 float32/float64 收盘价数组，长度至少 2。Welford 算法一遍算出均值和方差，
+    不生成收益率数组。
+    """
+    n = close.shape[0] - 1
+    mean = 0.0
+    m2 = 0.0
+    for i in range(n):
+        r = (close[i + 1] - close[i]) / close[i]
+        delta = r - mean
+        mean += delta / (i + 1)
+        m2 += delta * (r - mean)
+    return math.sqrt(m2 / n * 252.0)
+
+
+if HAS_NUMBA:
+    # 导入时按 float32/float64 签名预编译一次 (cache=True 时之后直接读缓存)
+    for _dtype in (np.float32, np.float64):
+        _atr_loop(np.zeros(20, _dtype), np.zeros(20, _dtype), np.zeros(20, _dtype), 14)
+        _vol_loop(np.ones(20, _dtype))
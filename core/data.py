@@ -1,10 +1,16 @@
 """
 数据获取模块
 """
+from __future__ import annotations
+
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 
+import numpy as np
+
 try:
     from dotenv import load_dotenv
     load_dotenv()
@@ -37,6 +43,17 @@ except ImportError:
     print("⚠️  longport library not found. Using Mock Data mode.")
 
 
+def _mock_quote_arrays(n: int) -> dict:
+    """批量生成模拟行情字段 (每个字段一次 NumPy 随机数调用)"""
+    rng = np.random.default_rng()
+    return {
+        "price": rng.uniform(100, 200, n),
+        "pe_ttm": rng.uniform(10, 50, n),
+        "pb_ratio": rng.uniform(1, 10, n),
+        "market_cap": rng.uniform(1e9, 1e12, n),
+    }
+
+
 class MockQuote:
     """模拟行情对象"""
     def __init__(self, symbol, price, pe=None, pb=None, mkt_cap=None):
@@ -69,39 +86,99 @@ class MockCandle:
 class DataFetcher:
     """行情数据获取器"""
     
+    # 连接相关对象均在首次使用时才创建，避免仅读取缓存/Mock 数据时建立网络连接
+    
     def __init__(self):
-        if HAS_LONGPORT:
-            self.config = Config.from_env()
-            self.quote_ctx = QuoteContext(self.config)
-            
-            if FinancialContext:
-                try:
-                    self.financial_ctx = FinancialContext(self.config)
-                except Exception:
-                    self.financial_ctx = None
-            else:
-                self.financial_ctx = None
-        else:
-            self.quote_ctx = None
-            self.financial_ctx = None
+        # 批量请求的工作线程可能同时首次访问连接，创建过程加锁，保证只建立一个连接
+        # (可重入: 创建行情/财务上下文时会读取 config)
+        self._conn_lock = threading.RLock()
+        self._conns = {}
+    
+    def _get_conn(self, name: str, create):
+        """返回已创建的连接对象，首次访问时调用 create 创建 (双重检查加锁)"""
+        conns = self._conns
+        if name in conns:
+            return conns[name]
+        with self._conn_lock:
+            if name not in conns:
+                conns[name] = create()
+            return conns[name]
+    
+    @property
+    def config(self):
+        """长桥 API 配置（首次访问时从环境变量加载）"""
+        return self._get_conn("config", self._create_config)
+    
+    @property
+    def quote_ctx(self):
+        """行情上下文（首次访问时建立连接）"""
+        return self._get_conn("quote_ctx", self._create_quote_ctx)
+    
+    @property
+    def financial_ctx(self):
+        """财务上下文（首次访问时建立连接，不可用时为 None）"""
+        return self._get_conn("financial_ctx", self._create_financial_ctx)
+    
+    def _create_config(self):
+        if not HAS_LONGPORT:
+            return None
+        return Config.from_env()
+    
+    def _create_quote_ctx(self):
+        if not HAS_LONGPORT:
+            return None
+        return QuoteContext(self.config)
+    
+    def _create_financial_ctx(self):
+        if not HAS_LONGPORT or not FinancialContext:
+            return None
+        try:
+            return FinancialContext(self.config)
+        except Exception:
+            return None
     
     def get_realtime_quotes(self, symbols: list) -> list:
         """获取实时行情"""
         if HAS_LONGPORT:
             return self.quote_ctx.quote(symbols)
         else:
-            # Mock Data
-            import random
+            # Mock Data: 每个字段一次性批量生成
+            mock = _mock_quote_arrays(len(symbols))
             return [
-                MockQuote(
-                    s, 
-                    random.uniform(100, 200),
-                    pe=random.uniform(10, 50),
-                    pb=random.uniform(1, 10),
-                    mkt_cap=random.uniform(1e9, 1e12)
-                ) for s in symbols
+                MockQuote(s, price, pe=pe, pb=pb, mkt_cap=mkt_cap)
+                for s, price, pe, pb, mkt_cap in zip(
+                    symbols,
+                    mock["price"].tolist(),
+                    mock["pe_ttm"].tolist(),
+                    mock["pb_ratio"].tolist(),
+                    mock["market_cap"].tolist(),
+                )
             ]
     
+    def subscribe_quotes(self, symbols: list, on_price) -> bool:
+        """
+        订阅实时报价推送，每次推送调用 on_price(symbol, 最新价)
+        
+        回调在 SDK 的推送线程中执行，应尽快返回 (如放入队列)。
+        Mock 模式下没有推送，返回 False，调用方需改为轮询。
+        """
+        if not HAS_LONGPORT:
+            return False
+        from longport.openapi import SubType
+        
+        self.quote_ctx.set_on_quote(lambda symbol, event: on_price(symbol, float(event.last_done)))
+        if symbols:
+            self.quote_ctx.subscribe(list(symbols), [SubType.Quote])
+        return True
+    
+    def unsubscribe_quotes(self, symbols: list):
+        """取消报价推送订阅"""
+        if not HAS_LONGPORT or not symbols:
+            return
+        from longport.openapi import SubType
+        
+        self.quote_ctx.unsubscribe(list(symbols), [SubType.Quote])
+    
     def get_candlesticks(
         self, 
         symbol: str, 
@@ -164,6 +241,41 @@ class DataFetcher:
                 "turnover": float(c.turnover),
             })
         return data
+    
+    def get_kline_df_batch(
+        self,
+        symbols: list,
+        days: int = 100,
+        max_workers: int = 16,
+        errors: Optional[dict] = None
+    ) -> dict:
+        """
+        批量获取K线数据 {symbol: 字典列表}
+        
+        长桥没有多标的K线接口，这里在同一个行情连接上并发发出各标的的请求，
+        总耗时约为最慢的一次请求而非逐只累加。获取失败的标的不出现在结果中；
+        传入 errors 字典时异常记录到 errors[symbol]。
+        """
+        def fetch(symbol):
+            try:
+                return self.get_kline_df(symbol, days=days), None
+            except Exception as e:
+                return None, e
+        
+        if max_workers > 1 and len(symbols) > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(symbols))) as executor:
+                fetched = list(executor.map(fetch, symbols))
+        else:
+            fetched = [fetch(symbol) for symbol in symbols]
+        
+        result = {}
+        for symbol, (data, error) in zip(symbols, fetched):
+            if error is not None:
+                if errors is not None:
+                    errors[symbol] = error
+            else:
+                result[symbol] = data
+        return result
 
     def get_multi_factor_data(self, symbols: list) -> list:
         """
@@ -275,9 +387,15 @@ class DataFetcher:
 
 # 单例
 _fetcher = None
+_fetcher_lock = threading.Lock()
 
 def get_fetcher() -> DataFetcher:
     global _fetcher
-    if _fetcher is None:
-        _fetcher = DataFetcher()
-    return _fetcher
+    fetcher = _fetcher
+    if fetcher is not None:
+        return fetcher
+    # 后台预热线程与主线程可能同时首次调用，只创建一个实例 (共用一个行情连接)
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = DataFetcher()
+        return _fetcher
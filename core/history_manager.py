@@ -3,21 +3,34 @@
 负责本地数据的存储、读取和自动更新 (缓存机制)
 """
 import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import yfinance as yf
 from datetime import datetime, timedelta
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "history")
 
+# symbol -> 文件名: AAPL.US -> AAPL_US
+_SYMBOL_FILENAME_TRANS = str.maketrans({".": "_"})
+# symbol -> yfinance 代码: 去掉 .US 后缀，港股保留 .HK
+_YF_US_SUFFIX_RE = re.compile(r"\.US$")
+# 本进程刚下载过的数据在这段时间 (秒) 内视为最新: 周末、节假日和开盘前最新K线必然早于
+# "现在 - 1 天"，只看日期会把 warm 刚写入的数据又判为过期、重新下载一遍
+_DOWNLOAD_FRESH_SECONDS = 6 * 3600
+
 class HistoryManager:
     def __init__(self, data_dir=DATA_DIR):
         self.data_dir = data_dir
         if not os.path.exists(self.data_dir):
             os.makedirs(self.data_dir)
+        # symbol -> (下载时间 monotonic, 下载起始日期)
+        self._downloaded = {}
             
     def get_file_path(self, symbol):
         # 兼容处理: symbol 中的 .US, .HK 等
-        safe_symbol = symbol.replace(".", "_")
+        safe_symbol = symbol.translate(_SYMBOL_FILENAME_TRANS)
         return os.path.join(self.data_dir, f"{safe_symbol}.csv")
 
     def load_local_data(self, symbol):
@@ -29,7 +42,9 @@ class HistoryManager:
         try:
             df = pd.read_csv(file_path)
             if 'date' in df.columns:
+                # 统一为 datetime64 并按日期升序，便于后续 searchsorted 截取
                 df['date'] = pd.to_datetime(df['date'])
+                df = df.sort_values('date', ignore_index=True)
             return df
         except Exception as e:
             print(f"⚠️ 读取本地数据 {symbol} 失败: {e}")
@@ -45,6 +60,113 @@ class HistoryManager:
         df.to_csv(file_path, index=False)
         # print(f"💾 已缓存 {symbol} 数据至 {file_path}")
 
+    def _mark_downloaded(self, symbol, download_start):
+        self._downloaded[symbol] = (time.monotonic(), download_start)
+
+    def _needs_update(self, df_local, target_start_date, symbol=None):
+        """本地缓存是否缺失、过旧或长度不足 (本进程刚下载过且覆盖所需区间的视为最新)"""
+        if df_local is None or df_local.empty:
+            return True
+        
+        downloaded = self._downloaded.get(symbol)
+        if downloaded is not None:
+            downloaded_at, download_start = downloaded
+            if time.monotonic() - downloaded_at < _DOWNLOAD_FRESH_SECONDS and download_start <= target_start_date:
+                return False
+        
+        # 检查最新日期 (load_local_data 已按日期排序)
+        last_date = df_local['date'].iat[-1]
+        # 如果最新日期比昨天早 (考虑到时差和周末，宽容度设为2天)
+        # 比如今天是周五，最新数据应该是周四收盘；如果是周一，最新可能是周五。
+        # 简单起见，如果最新数据比 (现在-1天) 早，就尝试更新
+        if last_date < datetime.now() - timedelta(days=1):
+            # 还可以进一步判断是否是周末，这里简化处理，有缺口就更新
+            return True
+            
+        # 检查最早日期是否满足 days 要求
+        first_date = df_local['date'].iat[0]
+        if first_date > target_start_date + timedelta(days=5): # 允许5天误差
+            # 本地数据不够长，需要重新下载更早的
+            return True
+        
+        return False
+
+    def _slice_from(self, df, start_date):
+        """截取 start_date 之后的数据 (df 需已按 date 升序)"""
+        if df is None or df.empty or 'date' not in df.columns:
+            return df
+        start_idx = df['date'].searchsorted(pd.Timestamp(start_date))
+        return df.iloc[start_idx:]
+
+    def _clean_download(self, df_new):
+        """清洗 yfinance 下载结果 (同 backtest_runner_yf.py)"""
+        if isinstance(df_new.columns, pd.MultiIndex):
+            df_new.columns = df_new.columns.get_level_values(0)
+        
+        df_new.columns = [c.lower() for c in df_new.columns]
+        df_new.reset_index(inplace=True)
+        if 'Date' in df_new.columns:
+            df_new.rename(columns={'Date': 'date'}, inplace=True)
+        
+        # 确保 date 是 datetime
+        df_new['date'] = pd.to_datetime(df_new['date'])
+        return df_new
+
+    def warm(self, symbols, days=730, max_workers=16):
+        """
+        批量预热本地缓存
+        
+        并行读取本地 CSV，找出缺失/过期的标的后用一次 yf.download 批量下载
+        (yfinance 内部多线程)，之后的 fetch_and_update 只需读盘。
+        注意 yf.download 依赖模块级共享状态，不能在多个线程里同时调用，
+        所以这里不对 fetch_and_update 本身做线程池并发。
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return
+        
+        target_start_date = datetime.now() - timedelta(days=days)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            local_frames = list(executor.map(self.load_local_data, symbols))
+        
+        stale = [
+            symbol for symbol, df_local in zip(symbols, local_frames)
+            if self._needs_update(df_local, target_start_date, symbol)
+        ]
+        if not stale:
+            return
+        
+        yf_symbols = {symbol: _YF_US_SUFFIX_RE.sub("", symbol) for symbol in stale}
+        try:
+            download_start = target_start_date - timedelta(days=10)
+            df_all = yf.download(
+                list(yf_symbols.values()),
+                start=download_start,
+                progress=False,
+                timeout=15,
+                group_by='ticker',
+                threads=min(max_workers, len(stale)),
+            )
+        except Exception as e:
+            print(f"⚠️ 批量预热失败 ({type(e).__name__})，将按需逐个更新")
+            return
+        
+        for symbol, yf_symbol in yf_symbols.items():
+            try:
+                if isinstance(df_all.columns, pd.MultiIndex):
+                    df_new = df_all[yf_symbol]
+                else:
+                    df_new = df_all
+                # 多标的下载按日期对齐，去掉该标的无数据的行
+                df_new = df_new.dropna(how='all')
+                if df_new.empty:
+                    continue
+                self.save_data(symbol, self._clean_download(df_new.copy()))
+                self._mark_downloaded(symbol, download_start)
+            except Exception as e:
+                print(f"⚠️ 预热 {symbol} 失败 ({type(e).__name__})")
+
     def fetch_and_update(self, symbol, days=730, force_update=False):
         """
         智能获取数据:
@@ -57,38 +179,21 @@ class HistoryManager:
         # 目标开始日期
         target_start_date = datetime.now() - timedelta(days=days)
         
-        needs_update = False
-        
-        if df_local is None or df_local.empty or force_update:
-            needs_update = True
-        else:
-            # 检查最新日期
-            last_date = df_local['date'].max()
-            # 如果最新日期比昨天早 (考虑到时差和周末，宽容度设为2天)
-            # 比如今天是周五，最新数据应该是周四收盘；如果是周一，最新可能是周五。
-            # 简单起见，如果最新数据比 (现在-1天) 早，就尝试更新
-            if last_date < datetime.now() - timedelta(days=1):
-                # 还可以进一步判断是否是周末，这里简化处理，有缺口就更新
-                needs_update = True
-                
-            # 检查最早日期是否满足 days 要求
-            first_date = df_local['date'].min()
-            if first_date > target_start_date + timedelta(days=5): # 允许5天误差
-                # 本地数据不够长，需要重新下载更早的
-                needs_update = True
-
+        needs_update = force_update or self._needs_update(df_local, target_start_date, symbol)
+        
+        # 本地缓存中需要的日期范围 (命中缓存及下载失败回退时共用)
+        df_local_recent = self._slice_from(df_local, target_start_date)
+        
         if not needs_update:
             # print(f"✅ {symbol} 使用本地缓存 (最新: {df_local['date'].max().strftime('%Y-%m-%d')})")
-            # 过滤出需要的日期范围
-            df_local = df_local[df_local['date'] >= target_start_date]
-            return df_local
+            return df_local_recent
 
         # 需要更新
         # 策略：简单起见，直接覆盖下载 (yfinance 下载速度很快，增量逻辑复杂且易错)
         # 也可以做增量：start = last_date
         
         # yfinance symbol 转换
-        yf_symbol = symbol.replace(".US", "").replace(".HK", ".HK")
+        yf_symbol = _YF_US_SUFFIX_RE.sub("", symbol)
         
         try:
             # 多下载一点，防止边界问题
@@ -98,31 +203,22 @@ class HistoryManager:
             if df_new.empty:
                 print(f"⚠️ {symbol} 下载为空，使用本地缓存")
                 if df_local is not None and not df_local.empty:
-                    return df_local[df_local['date'] >= target_start_date] if 'date' in df_local.columns else df_local
+                    return df_local_recent
                 return None
             
-            # 清洗数据 (同 backtest_runner_yf.py)
-            if isinstance(df_new.columns, pd.MultiIndex):
-                df_new.columns = df_new.columns.get_level_values(0)
-            
-            df_new.columns = [c.lower() for c in df_new.columns]
-            df_new.reset_index(inplace=True)
-            if 'Date' in df_new.columns:
-                df_new.rename(columns={'Date': 'date'}, inplace=True)
-            
-            # 确保 date 是 datetime
-            df_new['date'] = pd.to_datetime(df_new['date'])
+            df_new = self._clean_download(df_new)
             
             # 保存全量
             self.save_data(symbol, df_new)
+            self._mark_downloaded(symbol, download_start)
             
             # 过滤返回
-            return df_new[df_new['date'] >= target_start_date]
+            return self._slice_from(df_new, target_start_date)
             
         except Exception as e:
             print(f"⚠️ 更新 {symbol} 失败 ({type(e).__name__}), 使用本地缓存")
             if df_local is not None and not df_local.empty:
-                return df_local[df_local['date'] >= target_start_date] if 'date' in df_local.columns else df_local
+                return df_local_recent
             return None
 
 # 单例
@@ -0,0 +1,51 @@
+"""
+JSON 读写工具
+
+orjson 为可选依赖: 安装时用它序列化/解析 (更快，直接输出 UTF-8 字节)，
+未安装时回退到标准库 json，输出一致。
+"""
+import os
+import json
+from functools import lru_cache
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_dumps(obj, indent: bool = False) -> bytes:
+    """序列化为 UTF-8 JSON 字节 (优先使用 orjson，未安装时回退到标准库 json)"""
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode("utf-8")
+
+
+def json_loads(data: bytes):
+    """解析 JSON 字节"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@lru_cache(maxsize=16)
+def _read_json_cached(path: str, mtime_ns: int):
+    return json_loads(Path(path).read_bytes())
+
+
+def read_json_file(path: str):
+    """
+    读取 JSON 配置文件，文件不存在时返回 None
+    
+    按 (路径, 修改时间) 缓存解析结果，文件未改动时不再重复读取和解析；
+    返回的对象为共享缓存，调用方不要修改
+    """
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    return _read_json_cached(path, mtime_ns)
@@ -1,3 +1,4 @@
+import weakref
 from enum import Enum
 from dataclasses import dataclass
 from typing import List, Dict, Optional
@@ -17,11 +18,38 @@ class RegimeAnalysis:
     trend_strength: float  # 0-100
     description: str
 
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """简单移动平均 (只保留完整窗口，等价于 rolling(window).mean().dropna())"""
+    return np.convolve(values, np.ones(window) / window, mode='valid')
+
+
 class RegimeDetector:
     """市场状态识别器"""
     
     def __init__(self, adx_period=14):
         self.adx_period = adx_period
+        # 最近一次使用的 DataFrame 的 (high, low, close) 数组缓存: (弱引用, 行数, 数组)
+        self._hlc_cache = None
+
+    def _hlc(self, df: pd.DataFrame):
+        """
+        取出 high/low/close 的 float64 数组
+        
+        analyze 与 calculate_adx 对同一个 DataFrame 背靠背调用，这里按对象身份
+        + 行数缓存一份，避免重复 __getitem__ 和类型转换。不放进 df.attrs，
+        因为 pandas 会把 attrs 深拷贝到每个派生对象上。
+        """
+        cached = self._hlc_cache
+        if cached is not None and cached[0]() is df and cached[1] == len(df):
+            return cached[2]
+        
+        hlc = (
+            df['high'].to_numpy(dtype=np.float64),
+            df['low'].to_numpy(dtype=np.float64),
+            df['close'].to_numpy(dtype=np.float64),
+        )
+        self._hlc_cache = (weakref.ref(df), len(df), hlc)
+        return hlc
 
     def calculate_adx(self, df: pd.DataFrame) -> float:
         """计算 ADX 指标 (趋势强度)"""
@@ -29,31 +57,37 @@ class RegimeDetector:
         if len(df) < self.adx_period * 2:
             return 0.0
             
-        high = df['high']
-        low = df['low']
-        close = df['close']
+        high, low, close = self._hlc(df)
+        prev_close = close[:-1]
         
-        # 1. TR
-        tr1 = high - low
-        tr2 = abs(high - close.shift(1))
-        tr3 = abs(low - close.shift(1))
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+        # 1. TR (首根K线没有前收盘价，只取 high - low)
+        tr = np.empty_like(high)
+        tr[0] = high[0] - low[0]
+        tr[1:] = np.maximum.reduce([
+            high[1:] - low[1:],
+            np.abs(high[1:] - prev_close),
+            np.abs(low[1:] - prev_close),
+        ])
         
         # 2. DM
-        up_move = high - high.shift(1)
-        down_move = low.shift(1) - low
+        up_move = np.diff(high, prepend=np.nan)
+        down_move = -np.diff(low, prepend=np.nan)
         
         plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0)
         minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0)
         
         # 3. Smoothed
-        atr = tr.rolling(self.adx_period).mean()
-        plus_di = 100 * (pd.Series(plus_dm).rolling(self.adx_period).mean() / atr)
-        minus_di = 100 * (pd.Series(minus_dm).rolling(self.adx_period).mean() / atr)
-        
-        # 4. ADX
-        dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
-        adx = dx.rolling(self.adx_period).mean().iloc[-1]
+        period = self.adx_period
+        atr = _rolling_mean(tr, period)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            plus_di = 100 * (_rolling_mean(plus_dm, period) / atr)
+            minus_di = 100 * (_rolling_mean(minus_dm, period) / atr)
+            
+            # 4. ADX
+            dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+        if len(dx) < period:
+            return 0.0
+        adx = float(dx[-period:].mean())
         
         return adx if not np.isnan(adx) else 0.0
 
@@ -68,10 +102,14 @@ class RegimeDetector:
         if len(df) < 50:
             return RegimeAnalysis(MarketRegime.SIDEWAYS, 0, 0, "数据不足")
 
-        current_price = df['close'].iloc[-1]
-        ma20 = df['close'].rolling(20).mean().iloc[-1]
-        ma50 = df['close'].rolling(50).mean().iloc[-1]
-        ma200 = df['close'].rolling(200).mean().iloc[-1]
+        close = self._hlc(df)[2]
+        current_price = close[-1]
+        ma20 = close[-20:].mean()
+        ma50 = close[-50:].mean()
+        ma200 = close[-200:].mean() if len(close) >= 200 else np.nan
+        
+        bull_aligned = ma20 > ma50 > ma200
+        bear_aligned = ma20 < ma50 < ma200
         
         # 计算 ADX
         adx = self.calculate_adx(df)
@@ -81,14 +119,14 @@ class RegimeDetector:
         # 1. 强趋势判断 (ADX > 30)
         if adx > 30:
             # 判断方向
-            if ma20 > ma50 > ma200:
+            if bull_aligned:
                 return RegimeAnalysis(
                     MarketRegime.TRENDING_UP,
                     adx,
                     adx, # ADX值即强度
                     f"强上升趋势 (ADX={adx:.1f}, 均线多头)"
                 )
-            elif ma20 < ma50 < ma200:
+            elif bear_aligned:
                 return RegimeAnalysis(
                     MarketRegime.TRENDING_DOWN,
                     adx,
@@ -9,14 +9,41 @@
 5. 交易日志 - 记录所有交易
 6. 紧急停止 - 一键暂停交易
 """
+import io
 import os
-import json
-from datetime import datetime, date
+import time
+import queue
+import atexit
+import threading
+import weakref
+from collections import deque
+from datetime import datetime, date, timedelta
 from dataclasses import dataclass, asdict
 from typing import Optional, List, Dict
 from enum import Enum
 from pathlib import Path
 
+import numpy as np
+
+from ._njit import njit, prange, HAS_NUMBA
+from .jsonio import json_dumps, json_loads, read_json_file
+
+# 状态变更日志超过该大小时合并为快照
+JOURNAL_COMPACT_BYTES = 4 * 1024 * 1024
+
+# 持仓数达到该值时 scan_positions_for_exit 改用数组批量比较，
+# 持仓较少时逐个判断更快 (省去建数组的固定开销)
+SCAN_VECTORIZE_MIN_POSITIONS = 32
+
+# 状态变更先在内存中合并 (同一 key 只保留最新值)，累计到 JOURNAL_FLUSH_EVERY 次
+# 或距上次写出超过 JOURNAL_FLUSH_INTERVAL 秒才写入变更日志；紧急停止立即写出。
+# 进程崩溃时最多丢失最近约 1 秒的止损/统计更新
+JOURNAL_FLUSH_EVERY = 32
+JOURNAL_FLUSH_INTERVAL = 1.0
+
+# 每日统计最多保留的天数，更早的记录在插入新一天时淘汰
+DAILY_STATS_KEEP_DAYS = 90
+
 
 class RiskLevel(Enum):
     """风险级别"""
@@ -26,9 +53,78 @@ class RiskLevel(Enum):
     CRITICAL = "critical"
 
 
-@dataclass
+# 风险级别编码 (与 _risk_kernel 返回的 level 对应)
+_RISK_LEVELS = (RiskLevel.LOW, RiskLevel.MEDIUM, RiskLevel.HIGH, RiskLevel.CRITICAL)
+
+# 风险级别对应的报告图标
+_RISK_EMOJI = {
+    RiskLevel.LOW: "🟢",
+    RiskLevel.MEDIUM: "🟡",
+    RiskLevel.HIGH: "🟠",
+    RiskLevel.CRITICAL: "🔴",
+}
+
+
+@njit(cache=True)
+def _risk_kernel(quantity, cost_price, current_price, stop_loss_pct):
+    """
+    单个持仓的市值、盈亏、盈亏比例与风险级别编码
+    
+    Returns:
+        (market_value, unrealized_pnl, unrealized_pnl_pct, level)
+    """
+    market_value = quantity * current_price
+    cost_value = quantity * cost_price
+    pnl = market_value - cost_value
+    pnl_pct = pnl / cost_value if cost_value > 0 else 0.0
+    
+    # 无分支分级: 两档阈值比较结果相加得到 0/1/2，触及止损线直接取 3
+    # (用 max 而不是三项相加，止损线小于 3% 时结果仍与逐级判断一致)
+    # (显式 int: 输入为 numpy 标量时 np.bool_ 相加是逻辑或)
+    level = max(int(pnl_pct <= -0.01) + int(pnl_pct <= -0.03), 3 * int(pnl_pct <= -stop_loss_pct))
+    return market_value, pnl, pnl_pct, level
+
+
+@njit(cache=True, parallel=True)
+def _risk_kernel_batch(quantity, cost_price, current_price, stop_loss_pct):
+    """_risk_kernel 的批量版本 (输入为等长 float64 数组，numba 下多线程执行)"""
+    n = quantity.shape[0]
+    market_value = np.empty(n)
+    pnl = np.empty(n)
+    pnl_pct = np.empty(n)
+    level = np.empty(n, dtype=np.int64)
+    for i in prange(n):
+        market_value[i], pnl[i], pnl_pct[i], level[i] = _risk_kernel(
+            quantity[i], cost_price[i], current_price[i], stop_loss_pct
+        )
+    return market_value, pnl, pnl_pct, level
+
+
+@njit(cache=True, parallel=True)
+def _scan_exits_kernel(price, cost_price, stop_loss, take_profit, default_stop_loss_pct, default_take_profit_pct):
+    """
+    批量判断是否触发止损/止盈
+
+    stop_loss / take_profit 为 NaN 表示未设置，按成本价和默认比例计算；
+    价格不大于 0 (无报价) 的持仓不触发。
+    """
+    n = price.shape[0]
+    hit = np.empty(n, dtype=np.bool_)
+    for i in prange(n):
+        p = price[i]
+        sl = stop_loss[i]
+        if np.isnan(sl):
+            sl = cost_price[i] * (1 - default_stop_loss_pct)
+        tp = take_profit[i]
+        if np.isnan(tp):
+            tp = cost_price[i] * (1 + default_take_profit_pct)
+        hit[i] = p > 0 and (p <= sl or p >= tp)
+    return hit
+
+
+@dataclass(slots=True, frozen=True)
 class RiskConfig:
-    """风控配置"""
+    """风控配置 (不可变，修改请用 dataclasses.replace 生成新实例)"""
     # 资金控制
     max_trading_capital: float = None          # 交易资金上限（None=使用账户全部资金）
     
@@ -57,19 +153,17 @@ class RiskConfig:
     @classmethod
     def from_file(cls, path: str) -> "RiskConfig":
         """从文件加载配置"""
-        if os.path.exists(path):
-            with open(path, "r") as f:
-                data = json.load(f)
-                return cls(**data)
+        data = read_json_file(path)
+        if data is not None:
+            return cls(**data)
         return cls()
     
     def to_file(self, path: str):
         """保存配置到文件"""
-        with open(path, "w") as f:
-            json.dump(asdict(self), f, indent=2, ensure_ascii=False)
+        Path(path).write_bytes(json_dumps(asdict(self), indent=True))
 
 
-@dataclass
+@dataclass(slots=True)
 class TradeRecord:
     """交易记录"""
     id: str
@@ -85,10 +179,23 @@ class TradeRecord:
     pnl: Optional[float] = None  # 平仓时的盈亏
     
     def to_dict(self) -> dict:
-        return asdict(self)
+        # 字段都是基本类型，直接构造字典 (asdict 会递归 deepcopy)
+        return {
+            "id": self.id,
+            "timestamp": self.timestamp,
+            "symbol": self.symbol,
+            "side": self.side,
+            "quantity": self.quantity,
+            "price": self.price,
+            "value": self.value,
+            "order_id": self.order_id,
+            "status": self.status,
+            "reason": self.reason,
+            "pnl": self.pnl,
+        }
 
 
-@dataclass 
+@dataclass(slots=True)
 class PositionRisk:
     """持仓风险信息"""
     symbol: str
@@ -111,6 +218,234 @@ class PositionRisk:
         return self.current_price >= self.take_profit_price
 
 
+class _AppendLog:
+    """
+    追加写日志文件 (jsonl)
+    
+    首次写入时打开文件并长期持有句柄，之后每条记录只需一次 write，
+    不再为每条记录重复 open/close。
+    """
+    
+    def __init__(self, path: Path, buffer_size: int = 1 << 16):
+        self.path = path
+        self._buffer_size = buffer_size
+        self._fp = None
+    
+    def write_lines(self, lines: List[bytes]):
+        """写入若干行 (合并为一次 write) 并刷新到文件"""
+        if self._fp is None:
+            self._fp = open(self.path, "ab", buffering=self._buffer_size)
+        self._fp.write(b"".join(lines))
+        self._fp.flush()
+    
+    def close(self):
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+
+class _BackgroundWriter:
+    """
+    后台写日志线程
+    
+    调用方只把 (日志, 行) 放进队列即返回，由后台线程批量取出
+    (每次最多 WRITE_BATCH 条)，按文件合并成一次 write。
+    需要确保落盘时调用 flush()，它会等到此前入队的记录全部写完。
+    """
+    
+    WRITE_BATCH = 64
+    
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+    
+    def submit(self, log: _AppendLog, line: bytes):
+        """提交一行待写入的记录"""
+        if self._thread is None:
+            self._start()
+        self._queue.put((log, line))
+    
+    def flush(self, timeout: float = None):
+        """阻塞直到此前提交的记录全部写入文件"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put((None, done))
+        done.wait(timeout)
+    
+    def close(self, timeout: float = None):
+        """写完已提交的记录后结束后台线程 (之后再 submit 会重新启动)"""
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put((None, None))
+        thread.join(timeout)
+        with self._start_lock:
+            if self._thread is thread:
+                self._thread = None
+    
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="risk-log-writer", daemon=True)
+                self._thread.start()
+    
+    def _run(self):
+        q = self._queue
+        while True:
+            batch = [q.get()]
+            while len(batch) < self.WRITE_BATCH:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+            
+            pending: Dict[_AppendLog, List[bytes]] = {}
+            for log, item in batch:
+                if log is None:
+                    # flush/close 标记: 先写完它之前的记录
+                    self._write(pending)
+                    pending = {}
+                    if item is None:
+                        return
+                    item.set()
+                else:
+                    pending.setdefault(log, []).append(item)
+            self._write(pending)
+    
+    @staticmethod
+    def _write(pending: Dict[_AppendLog, List[bytes]]):
+        for log, lines in pending.items():
+            try:
+                log.write_lines(lines)
+            except Exception as e:
+                print(f"⚠️ 写入日志失败 {log.path.name}: {e}")
+
+
+def _is_buy(side: str) -> bool:
+    """买卖方向是否为买入 (规范的小写值直接比较，其他大小写写法才调用 lower)"""
+    if side == "buy":
+        return True
+    if side == "sell":
+        return False
+    return side.lower() == "buy"
+
+
+def _make_order_validator(cfg: RiskConfig):
+    """
+    为给定配置生成专用的订单验证函数
+    
+    阈值与固定的提示文本在生成时一次算好、作为闭包常量，
+    每次验证不再读取 config 属性或重复格式化。配置变更时需重新生成
+    (RiskManager.config 的 setter 会自动处理)。
+    """
+    min_order_value = cfg.min_order_value
+    max_order_value = cfg.max_order_value
+    max_single_pct = cfg.max_single_position_pct
+    max_total_pct = cfg.max_total_position_pct
+    min_cash_pct = cfg.min_cash_reserve_pct
+    daily_trade_limit = cfg.daily_trade_limit
+    daily_loss_limit_pct = cfg.daily_loss_limit_pct
+    cooldown = cfg.order_cooldown_seconds
+    capital_cap = cfg.max_trading_capital if cfg.max_trading_capital and cfg.max_trading_capital > 0 else None
+    
+    msg_min_order = f"低于最小限制 {min_order_value}"
+    msg_max_order = f"超过最大限制 {max_order_value}"
+    msg_single_pct = f"({max_single_pct:.0%})"
+    msg_total_pct = f"({max_total_pct:.0%})"
+    msg_cash_pct = f"({min_cash_pct:.0%})"
+    msg_trade_limit = f"已达到每日交易次数限制 ({daily_trade_limit})"
+    msg_loss_limit = f"已达到每日亏损限额 ({daily_loss_limit_pct:.1%})"
+    
+    def validate(rm, symbol, side, quantity, price, account_balance, current_positions, total_position_value):
+        # 检查 1: 紧急停止
+        if rm._emergency_stop:
+            return False, "交易已紧急停止，请先调用 resume_trading()"
+        
+        # 使用有效交易资金（考虑 max_trading_capital 限制）
+        effective_balance = account_balance if capital_cap is None else min(account_balance, capital_cap)
+        
+        order_value = quantity * price
+        
+        # 检查 2: 订单金额范围
+        if order_value < min_order_value:
+            return False, f"订单金额 {order_value:.2f} {msg_min_order}"
+        
+        if order_value > max_order_value:
+            return False, f"订单金额 {order_value:.2f} {msg_max_order}"
+        
+        # 检查 3: 单笔仓位限制
+        max_single_value = effective_balance * max_single_pct
+        if order_value > max_single_value:
+            return False, f"订单金额 {order_value:.2f} 超过单笔仓位限制 {max_single_value:.2f} {msg_single_pct}"
+        
+        is_buy = _is_buy(side)
+        
+        # 检查 4/5 共用的持仓总市值（仅买入时需要）
+        if is_buy and total_position_value is None:
+            total_position_value = sum(p.get("market_value", 0) for p in current_positions)
+        
+        # 检查 4: 总仓位限制（仅买入时检查）
+        if is_buy:
+            new_total = total_position_value + order_value
+            max_total_value = effective_balance * max_total_pct
+            
+            if new_total > max_total_value:
+                return False, f"买入后总仓位 {new_total:.2f} 将超过限制 {max_total_value:.2f} {msg_total_pct}"
+        
+        # 检查 5: 现金保留
+        if is_buy:
+            min_cash = effective_balance * min_cash_pct
+            available_cash = effective_balance - total_position_value
+            if available_cash - order_value < min_cash:
+                return False, f"买入后现金将低于保留要求 {min_cash:.2f} {msg_cash_pct}"
+        
+        # 检查 6: 每日交易次数
+        daily_stats = rm._get_daily_stats(rm._today())
+        if daily_stats["trade_count"] >= daily_trade_limit:
+            return False, msg_trade_limit
+        
+        # 检查 7: 每日亏损限额
+        realized_pnl = daily_stats["realized_pnl"]
+        if realized_pnl < 0 and -realized_pnl / effective_balance >= daily_loss_limit_pct:
+            return False, msg_loss_limit
+        
+        # 检查 8: 冷却时间
+        last_order = rm._last_order_time.get(symbol)
+        if last_order is not None:
+            elapsed = time.monotonic() - last_order
+            if elapsed < cooldown:
+                return False, f"冷却中，请等待 {cooldown - elapsed:.0f} 秒"
+        
+        return True, "订单验证通过"
+    
+    return validate
+
+
+def _empty_daily_stats() -> dict:
+    """全零的每日统计"""
+    return {
+        "trade_count": 0,
+        "realized_pnl": 0.0,
+        "buy_value": 0.0,
+        "sell_value": 0.0,
+    }
+
+
+# 存活的 RiskManager，进程退出前统一 flush
+_live_managers: "weakref.WeakSet[RiskManager]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_live_managers():
+    for rm in list(_live_managers):
+        try:
+            rm.flush()
+        except Exception as e:
+            print(f"⚠️ 退出前写入风控状态失败: {e}")
+
+
 class RiskManager:
     """风险管理器"""
     
@@ -122,12 +457,45 @@ class RiskManager:
         # 状态
         self._emergency_stop = False
         self._daily_stats: Dict[str, dict] = {}
-        self._last_order_time: Dict[str, datetime] = {}
-        self._position_stops: Dict[str, dict] = {}  # symbol -> {stop_loss, take_profit}
+        self._daily_stats_order: deque = deque(maxlen=DAILY_STATS_KEEP_DAYS)  # 按插入顺序记录日期
+        self._last_order_time: Dict[str, float] = {}  # symbol -> time.monotonic()
+        # 止损止盈价按列存储: symbol -> id，两个数组按 id 索引，NaN 表示未设置
+        self._sym_id: Dict[str, int] = {}
+        self._stops = np.full(64, np.nan)
+        self._take_profits = np.full(64, np.nan)
+        self._today_iso = ""
+        self._today_expires = 0.0  # 当天结束的时间戳，过后重新计算 _today_iso
+        
+        # 状态快照路径
+        self._state_path = self.data_dir / "risk_state.json"
+        self._state_tmp_path = self._state_path.with_suffix(".json.tmp")
+        
+        # 日志文件 (持久句柄)
+        self._trade_log = _AppendLog(self.data_dir / "trades.jsonl")
+        self._event_log = _AppendLog(self.data_dir / "risk_events.jsonl")
+        # 状态变更日志: 每次变更只追加一条增量记录，定期合并回 risk_state.json
+        self._journal = _AppendLog(self.data_dir / "risk_state.log.jsonl")
+        self._journal_size = 0
+        self._journal_pending: Dict[tuple, bytes] = {}  # (op, key) -> 尚未写出的最新记录
+        self._journal_flushed_at = time.monotonic()
+        
+        # 日志与变更记录交给后台线程写入，退出前自动 flush
+        self._writer = _BackgroundWriter()
+        _live_managers.add(self)
         
         # 加载持久化数据
         self._load_state()
     
+    @property
+    def config(self) -> RiskConfig:
+        """风控配置 (重新赋值时同步生成专用的订单验证函数)"""
+        return self._config
+    
+    @config.setter
+    def config(self, config: RiskConfig):
+        self._config = config
+        self._validate_order_fn = _make_order_validator(config)
+    
     # ==================== 紧急停止 ====================
     
     @property
@@ -138,12 +506,14 @@ class RiskManager:
     def emergency_stop(self, reason: str = "手动触发"):
         """紧急停止所有交易"""
         self._emergency_stop = True
+        self._journal_append("emergency_stop", {"v": True}, urgent=True)
         self._log_event("EMERGENCY_STOP", {"reason": reason})
         print(f"🚨 紧急停止已激活: {reason}")
     
     def resume_trading(self):
         """恢复交易"""
         self._emergency_stop = False
+        self._journal_append("emergency_stop", {"v": False}, urgent=True)
         self._log_event("RESUME_TRADING", {})
         print("✅ 交易已恢复")
     
@@ -168,87 +538,39 @@ class RiskManager:
         quantity: int,
         price: float,
         account_balance: float,
-        current_positions: List[dict]
+        current_positions: List[dict],
+        total_position_value: float = None
     ) -> tuple[bool, str]:
         """
         验证订单是否符合风控规则
         
+        Args:
+            total_position_value: 当前持仓总市值（可选，调用方已知时传入，
+                                  否则由 current_positions 汇总）
+        
         Returns:
             (is_valid, message)
         """
-        # 检查 1: 紧急停止
-        if self._emergency_stop:
-            return False, "交易已紧急停止，请先调用 resume_trading()"
-        
-        # 使用有效交易资金（考虑 max_trading_capital 限制）
-        effective_balance = self.get_effective_balance(account_balance)
-        
-        order_value = quantity * price
-        
-        # 检查 2: 订单金额范围
-        if order_value < self.config.min_order_value:
-            return False, f"订单金额 {order_value:.2f} 低于最小限制 {self.config.min_order_value}"
-        
-        if order_value > self.config.max_order_value:
-            return False, f"订单金额 {order_value:.2f} 超过最大限制 {self.config.max_order_value}"
-        
-        # 检查 3: 单笔仓位限制
-        max_single_value = effective_balance * self.config.max_single_position_pct
-        if order_value > max_single_value:
-            return False, f"订单金额 {order_value:.2f} 超过单笔仓位限制 {max_single_value:.2f} ({self.config.max_single_position_pct:.0%})"
-        
-        # 检查 4: 总仓位限制（仅买入时检查）
-        if side.lower() == "buy":
-            current_position_value = sum(p.get("market_value", 0) for p in current_positions)
-            new_total = current_position_value + order_value
-            max_total_value = effective_balance * self.config.max_total_position_pct
-            
-            if new_total > max_total_value:
-                return False, f"买入后总仓位 {new_total:.2f} 将超过限制 {max_total_value:.2f} ({self.config.max_total_position_pct:.0%})"
-        
-        # 检查 5: 现金保留
-        if side.lower() == "buy":
-            min_cash = effective_balance * self.config.min_cash_reserve_pct
-            available_cash = effective_balance - sum(p.get("market_value", 0) for p in current_positions)
-            if available_cash - order_value < min_cash:
-                return False, f"买入后现金将低于保留要求 {min_cash:.2f} ({self.config.min_cash_reserve_pct:.0%})"
-        
-        # 检查 6: 每日交易次数
-        today = date.today().isoformat()
-        daily_stats = self._get_daily_stats(today)
-        if daily_stats["trade_count"] >= self.config.daily_trade_limit:
-            return False, f"已达到每日交易次数限制 ({self.config.daily_trade_limit})"
-        
-        # 检查 7: 每日亏损限额
-        if daily_stats["realized_pnl"] < 0:
-            loss_pct = abs(daily_stats["realized_pnl"]) / effective_balance
-            if loss_pct >= self.config.daily_loss_limit_pct:
-                return False, f"已达到每日亏损限额 ({self.config.daily_loss_limit_pct:.1%})"
-        
-        # 检查 8: 冷却时间
-        if symbol in self._last_order_time:
-            elapsed = (datetime.now() - self._last_order_time[symbol]).total_seconds()
-            if elapsed < self.config.order_cooldown_seconds:
-                remaining = self.config.order_cooldown_seconds - elapsed
-                return False, f"冷却中，请等待 {remaining:.0f} 秒"
-        
-        return True, "订单验证通过"
+        if self._journal_pending and time.monotonic() - self._journal_flushed_at >= JOURNAL_FLUSH_INTERVAL:
+            self._flush_journal()
+        return self._validate_order_fn(
+            self, symbol, side, quantity, price,
+            account_balance, current_positions, total_position_value
+        )
     
     # ==================== 止损止盈 ====================
     
     def set_stop_loss(self, symbol: str, stop_loss_price: float):
         """设置止损价"""
-        if symbol not in self._position_stops:
-            self._position_stops[symbol] = {}
-        self._position_stops[symbol]["stop_loss"] = stop_loss_price
-        self._save_state()
+        i = self._symbol_id(symbol)  # 先取下标: 数组可能在这一步扩容
+        self._stops[i] = stop_loss_price
+        self._journal_append("stop_loss", {"symbol": symbol, "v": stop_loss_price}, key=symbol)
     
     def set_take_profit(self, symbol: str, take_profit_price: float):
         """设置止盈价"""
-        if symbol not in self._position_stops:
-            self._position_stops[symbol] = {}
-        self._position_stops[symbol]["take_profit"] = take_profit_price
-        self._save_state()
+        i = self._symbol_id(symbol)
+        self._take_profits[i] = take_profit_price
+        self._journal_append("take_profit", {"symbol": symbol, "v": take_profit_price}, key=symbol)
     
     def set_stops_from_cost(self, symbol: str, cost_price: float):
         """根据成本价自动设置止损止盈"""
@@ -266,25 +588,21 @@ class RiskManager:
         current_price: float
     ) -> PositionRisk:
         """检查持仓风险"""
-        market_value = quantity * current_price
-        cost_value = quantity * cost_price
-        unrealized_pnl = market_value - cost_value
-        unrealized_pnl_pct = unrealized_pnl / cost_value if cost_value > 0 else 0
+        cfg = self.config
+        stop_loss_pct = cfg.default_stop_loss_pct
+        market_value, unrealized_pnl, unrealized_pnl_pct, level = _risk_kernel(
+            quantity, cost_price, current_price, stop_loss_pct
+        )
         
         # 获取或计算止损止盈价
-        stops = self._position_stops.get(symbol, {})
-        stop_loss_price = stops.get("stop_loss", cost_price * (1 - self.config.default_stop_loss_pct))
-        take_profit_price = stops.get("take_profit", cost_price * (1 + self.config.default_take_profit_pct))
+        stop_loss_price, take_profit_price = self._get_stops(symbol)
+        if stop_loss_price is None:
+            stop_loss_price = cost_price * (1 - stop_loss_pct)
+        if take_profit_price is None:
+            take_profit_price = cost_price * (1 + cfg.default_take_profit_pct)
         
         # 评估风险级别
-        if unrealized_pnl_pct <= -self.config.default_stop_loss_pct:
-            risk_level = RiskLevel.CRITICAL
-        elif unrealized_pnl_pct <= -0.03:
-            risk_level = RiskLevel.HIGH
-        elif unrealized_pnl_pct <= -0.01:
-            risk_level = RiskLevel.MEDIUM
-        else:
-            risk_level = RiskLevel.LOW
+        risk_level = _RISK_LEVELS[level]
         
         return PositionRisk(
             symbol=symbol,
@@ -305,58 +623,167 @@ class RiskManager:
         quotes: Dict[str, float]
     ) -> List[PositionRisk]:
         """扫描持仓，返回需要止损/止盈的列表"""
-        exit_signals = []
+        if not positions:
+            return []
         
-        for pos in positions:
-            symbol = pos["symbol"]
-            current_price = quotes.get(symbol, pos.get("current_price", 0))
-            
-            if current_price <= 0:
-                continue
-            
-            risk = self.check_position_risk(
-                symbol=symbol,
+        # 先筛出触发止损/止盈的持仓，只为它们构建 PositionRisk
+        if len(positions) >= SCAN_VECTORIZE_MIN_POSITIONS:
+            cost, price, stop_loss, take_profit = self._stop_arrays(positions, quotes)
+            if HAS_NUMBA:
+                hit = _scan_exits_kernel(
+                    price, cost, stop_loss, take_profit,
+                    self.config.default_stop_loss_pct, self.config.default_take_profit_pct
+                )
+            else:
+                stop_loss, take_profit = self._fill_default_stops(cost, stop_loss, take_profit)
+                hit = (price > 0) & ((price <= stop_loss) | (price >= take_profit))
+            triggered = [positions[i] for i in np.flatnonzero(hit)]
+        else:
+            triggered = [
+                pos for pos in positions
+                if self._needs_exit(
+                    pos["symbol"], pos["cost_price"],
+                    quotes.get(pos["symbol"], pos.get("current_price", 0))
+                )
+            ]
+        
+        exit_signals = []
+        for pos in triggered:
+            exit_signals.append(self.check_position_risk(
+                symbol=pos["symbol"],
                 quantity=pos["quantity"],
                 cost_price=pos["cost_price"],
-                current_price=current_price
+                current_price=quotes.get(pos["symbol"], pos.get("current_price", 0))
+            ))
+        
+        return exit_signals
+    
+    def _needs_exit(self, symbol: str, cost_price: float, current_price: float) -> bool:
+        """单个持仓是否触发止损/止盈 (不构建 PositionRisk)"""
+        if current_price <= 0:
+            return False
+        stop_loss, take_profit = self._get_stops(symbol)
+        if stop_loss is None:
+            stop_loss = cost_price * (1 - self.config.default_stop_loss_pct)
+        if current_price <= stop_loss:
+            return True
+        if take_profit is None:
+            take_profit = cost_price * (1 + self.config.default_take_profit_pct)
+        return current_price >= take_profit
+    
+    def _stop_arrays(self, positions: List[dict], quotes: Dict[str, float]):
+        """持仓的成本价、现价、止损价、止盈价数组 (未设置的止损/止盈为 NaN)"""
+        n = len(positions)
+        cost = np.fromiter((p["cost_price"] for p in positions), dtype=np.float64, count=n)
+        price = np.fromiter(
+            (quotes.get(p["symbol"], p.get("current_price", 0)) for p in positions),
+            dtype=np.float64, count=n
+        )
+        
+        sym_id = self._sym_id
+        ids = np.fromiter((sym_id.get(p["symbol"], -1) for p in positions), dtype=np.int64, count=n)
+        known = ids >= 0
+        stop_loss = np.full(n, np.nan)
+        take_profit = np.full(n, np.nan)
+        stop_loss[known] = self._stops[ids[known]]
+        take_profit[known] = self._take_profits[ids[known]]
+        return cost, price, stop_loss, take_profit
+    
+    def _fill_default_stops(self, cost: np.ndarray, stop_loss: np.ndarray, take_profit: np.ndarray):
+        """未设置的止损/止盈按成本价和默认比例补齐"""
+        stop_loss = np.where(np.isnan(stop_loss), cost * (1 - self.config.default_stop_loss_pct), stop_loss)
+        take_profit = np.where(np.isnan(take_profit), cost * (1 + self.config.default_take_profit_pct), take_profit)
+        return stop_loss, take_profit
+    
+    def _position_arrays(
+        self,
+        positions: List[dict],
+        quotes: Dict[str, float]
+    ) -> Dict[str, np.ndarray]:
+        """
+        持仓转为按列存储的数组 (SoA)，并计算盈亏与风险级别
+        
+        计算顺序与 check_position_risk 完全一致，结果逐位相同。
+        """
+        quantity = np.fromiter((p["quantity"] for p in positions), dtype=np.float64, count=len(positions))
+        cost, price, stop_loss, take_profit = self._stop_arrays(positions, quotes)
+        stop_loss, take_profit = self._fill_default_stops(cost, stop_loss, take_profit)
+        
+        if HAS_NUMBA:
+            market_value, pnl, pnl_pct, risk_level = _risk_kernel_batch(
+                quantity, cost, price, self.config.default_stop_loss_pct
             )
+        else:
+            # 与 _risk_kernel 相同的计算，用 NumPy 向量化代替逐个调用
+            market_value = quantity * price
+            cost_value = quantity * cost
+            pnl = market_value - cost_value
+            with np.errstate(divide="ignore", invalid="ignore"):
+                pnl_pct = np.where(cost_value > 0, pnl / cost_value, 0.0)
             
-            if risk.should_stop_loss or risk.should_take_profit:
-                exit_signals.append(risk)
+            risk_level = np.maximum(
+                (pnl_pct <= -0.01).astype(np.int64) + (pnl_pct <= -0.03),
+                3 * (pnl_pct <= -self.config.default_stop_loss_pct)
+            )
         
-        return exit_signals
+        return {
+            "quantity": quantity,
+            "cost_price": cost,
+            "price": price,
+            "stop_loss": stop_loss,
+            "take_profit": take_profit,
+            "market_value": market_value,
+            "unrealized_pnl": pnl,
+            "unrealized_pnl_pct": pnl_pct,
+            "risk_level": risk_level,
+        }
     
     # ==================== 交易记录 ====================
     
     def record_trade(self, trade: TradeRecord):
         """记录交易"""
+        self._account_trade(trade)
+        
+        # 写入日志文件
+        self._append_trade_log(trade)
+    
+    def record_trades(self, trades: List[TradeRecord]):
+        """批量记录交易 (统计逐笔更新，交易日志一次写入)"""
+        if not trades:
+            return
+        for trade in trades:
+            self._account_trade(trade)
+        self._writer.submit(self._trade_log, b"".join(json_dumps(t.to_dict()) + b"\n" for t in trades))
+    
+    def _account_trade(self, trade: TradeRecord):
+        """按一笔交易更新每日统计和最后下单时间"""
         # 更新每日统计（仅统计有效订单）
         if trade.status not in ["rejected", "error", "cancelled"]:
-            today = date.today().isoformat()
+            today = self._today()
             daily_stats = self._get_daily_stats(today)
             daily_stats["trade_count"] += 1
             
             if trade.pnl is not None:
                 daily_stats["realized_pnl"] += trade.pnl
             
-            if trade.side == "buy":
+            if _is_buy(trade.side):
                 daily_stats["buy_value"] += trade.value
             else:
                 daily_stats["sell_value"] += trade.value
             
-            self._daily_stats[today] = daily_stats
+            self._journal_append("daily_stats", {"day": today, "v": daily_stats}, key=today)
         
         # 更新最后下单时间
         if trade.status in ["submitted", "filled"]:
-            self._last_order_time[trade.symbol] = datetime.now()
-        
-        # 写入日志文件
-        self._append_trade_log(trade)
-        self._save_state()
+            self._last_order_time[trade.symbol] = time.monotonic()
     
     def get_daily_stats(self, day: str = None) -> dict:
-        """获取每日统计"""
-        day = day or date.today().isoformat()
+        """获取每日统计 (查询已不在内存中的历史日期时返回全零统计，不写入、不挤掉已有的天)"""
+        today = self._today()
+        day = day or today
+        if day != today:
+            stats = self._daily_stats.get(day)
+            return stats if stats is not None else _empty_daily_stats()
         return self._get_daily_stats(day)
     
     # ==================== 仓位计算 ====================
@@ -381,12 +808,13 @@ class RiskManager:
             建议买入数量
         """
         # 使用有效交易资金
+        cfg = self.config
         effective_balance = self.get_effective_balance(account_balance)
-        risk_pct = risk_pct or self.config.max_single_position_pct
+        risk_pct = risk_pct or cfg.max_single_position_pct
         
         # 计算最大可用金额
         max_value = effective_balance * risk_pct
-        max_value = min(max_value, self.config.max_order_value)
+        max_value = min(max_value, cfg.max_order_value)
         
         # 计算数量（美股通常最小单位是1股）
         quantity = int(max_value / price)
@@ -405,69 +833,56 @@ class RiskManager:
         # 获取有效交易资金
         effective_balance = self.get_effective_balance(account_balance)
         
-        lines = []
-        lines.append("=" * 50)
-        lines.append("📊 风险报告")
-        lines.append(f"生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        lines.append("=" * 50)
+        buf = io.StringIO()
+        write = buf.write
+        write("=" * 50 + "\n")
+        write("📊 风险报告\n")
+        write(f"生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        write("=" * 50 + "\n")
         
         # 账户概览
         total_position_value = sum(p.get("market_value", 0) for p in positions)
         position_pct = total_position_value / effective_balance if effective_balance > 0 else 0
         
-        lines.append(f"\n💰 账户概览:")
-        lines.append(f"  总资产: {account_balance:,.2f}")
+        write(f"\n💰 账户概览:\n")
+        write(f"  总资产: {account_balance:,.2f}\n")
         if self.config.max_trading_capital and self.config.max_trading_capital > 0:
-            lines.append(f"  交易资金上限: {self.config.max_trading_capital:,.2f}")
-        lines.append(f"  有效交易资金: {effective_balance:,.2f}")
-        lines.append(f"  持仓市值: {total_position_value:,.2f} ({position_pct:.1%})")
-        lines.append(f"  可用额度: {effective_balance - total_position_value:,.2f}")
+            write(f"  交易资金上限: {self.config.max_trading_capital:,.2f}\n")
+        write(f"  有效交易资金: {effective_balance:,.2f}\n")
+        write(f"  持仓市值: {total_position_value:,.2f} ({position_pct:.1%})\n")
+        write(f"  可用额度: {effective_balance - total_position_value:,.2f}\n")
         
         # 持仓风险
-        lines.append(f"\n📈 持仓风险:")
+        write(f"\n📈 持仓风险:\n")
         critical_count = 0
         high_count = 0
         
-        for pos in positions:
-            symbol = pos["symbol"]
-            current_price = quotes.get(symbol, pos.get("current_price", 0))
-            
-            if current_price <= 0:
-                continue
-            
-            risk = self.check_position_risk(
-                symbol=symbol,
-                quantity=pos["quantity"],
-                cost_price=pos["cost_price"],
-                current_price=current_price
-            )
+        if positions:
+            arr = self._position_arrays(positions, quotes)
+            valid = arr["price"] > 0
+            levels = arr["risk_level"]
+            critical_count = int(np.count_nonzero(valid & (levels == 3)))
+            high_count = int(np.count_nonzero(valid & (levels == 2)))
             
-            emoji = {
-                RiskLevel.LOW: "🟢",
-                RiskLevel.MEDIUM: "🟡",
-                RiskLevel.HIGH: "🟠",
-                RiskLevel.CRITICAL: "🔴"
-            }[risk.risk_level]
-            
-            lines.append(f"  {emoji} {symbol}: {risk.unrealized_pnl_pct:+.2%} (止损: {risk.stop_loss_price:.2f}, 止盈: {risk.take_profit_price:.2f})")
-            
-            if risk.risk_level == RiskLevel.CRITICAL:
-                critical_count += 1
-            elif risk.risk_level == RiskLevel.HIGH:
-                high_count += 1
+            pnl_pct = arr["unrealized_pnl_pct"].tolist()
+            stop_loss = arr["stop_loss"].tolist()
+            take_profit = arr["take_profit"].tolist()
+            for i in np.flatnonzero(valid).tolist():
+                emoji = _RISK_EMOJI[_RISK_LEVELS[levels[i]]]
+                write(f"  {emoji} {positions[i]['symbol']}: {pnl_pct[i]:+.2%} (止损: {stop_loss[i]:.2f}, 止盈: {take_profit[i]:.2f})\n")
         
         if not positions:
-            lines.append("  (空仓)")
+            write("  (空仓)\n")
         
         # 每日统计
-        today = date.today().isoformat()
+        today = self._today()
         daily_stats = self._get_daily_stats(today)
         
-        lines.append(f"\n📅 今日统计:")
-        lines.append(f"  交易次数: {daily_stats['trade_count']} / {self.config.daily_trade_limit}")
-        lines.append(f"  已实现盈亏: {daily_stats['realized_pnl']:+,.2f}")
-        lines.append(f"  买入金额: {daily_stats['buy_value']:,.2f}")
-        lines.append(f"  卖出金额: {daily_stats['sell_value']:,.2f}")
+        write(f"\n📅 今日统计:\n")
+        write(f"  交易次数: {daily_stats['trade_count']} / {self.config.daily_trade_limit}\n")
+        write(f"  已实现盈亏: {daily_stats['realized_pnl']:+,.2f}\n")
+        write(f"  买入金额: {daily_stats['buy_value']:,.2f}\n")
+        write(f"  卖出金额: {daily_stats['sell_value']:,.2f}\n")
         
         # 风险警告
         warnings = []
@@ -481,67 +896,212 @@ class RiskManager:
             warnings.append(f"⚠️ 总仓位超限 ({position_pct:.1%} > {self.config.max_total_position_pct:.0%})")
         
         if warnings:
-            lines.append(f"\n⚠️ 风险警告:")
-            for w in warnings:
-                lines.append(f"  {w}")
+            write(f"\n⚠️ 风险警告:\n")
+            for warning in warnings:
+                write(f"  {warning}\n")
         
-        lines.append("\n" + "=" * 50)
+        write("\n" + "=" * 50)
         
-        return "\n".join(lines)
+        return buf.getvalue()
+    
+    # ==================== 持久化 ====================
+    
+    def flush(self):
+        """写出内存中合并的状态变更，并等待后台线程把日志全部写入文件"""
+        self._flush_journal()
+        self._writer.flush()
+    
+    def close(self):
+        """写完待写记录并关闭日志文件句柄 (之后仍可继续使用，写入时会重新打开)"""
+        self._flush_journal()
+        self._writer.close()
+        _live_managers.discard(self)
+        self._trade_log.close()
+        self._event_log.close()
+        self._journal.close()
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
     
     # ==================== 内部方法 ====================
     
+    def _today(self) -> str:
+        """今天的日期字符串 (缓存到当天午夜，跨日后自动刷新)"""
+        now = time.time()
+        if now >= self._today_expires:
+            today = date.today()
+            self._today_iso = today.isoformat()
+            self._today_expires = datetime.combine(today + timedelta(days=1), datetime.min.time()).timestamp()
+        return self._today_iso
+    
+    def _symbol_id(self, symbol: str) -> int:
+        """获取股票在止损止盈数组中的下标，新股票分配新下标 (数组容量不足时翻倍)"""
+        i = self._sym_id.get(symbol)
+        if i is None:
+            i = len(self._sym_id)
+            self._sym_id[symbol] = i
+            if i >= len(self._stops):
+                grow = np.full(len(self._stops), np.nan)
+                self._stops = np.concatenate((self._stops, grow))
+                self._take_profits = np.concatenate((self._take_profits, grow))
+        return i
+    
+    def _get_stops(self, symbol: str) -> tuple:
+        """(止损价, 止盈价)，未设置的为 None"""
+        i = self._sym_id.get(symbol)
+        if i is None:
+            return None, None
+        stop_loss = float(self._stops[i])
+        take_profit = float(self._take_profits[i])
+        return (
+            None if stop_loss != stop_loss else stop_loss,
+            None if take_profit != take_profit else take_profit,
+        )
+    
+    def _position_stops_dict(self) -> Dict[str, dict]:
+        """止损止盈转为 {symbol: {stop_loss, take_profit}} (持久化格式)"""
+        result = {}
+        for symbol in self._sym_id:
+            stop_loss, take_profit = self._get_stops(symbol)
+            stops = {}
+            if stop_loss is not None:
+                stops["stop_loss"] = stop_loss
+            if take_profit is not None:
+                stops["take_profit"] = take_profit
+            result[symbol] = stops
+        return result
+    
     def _get_daily_stats(self, day: str) -> dict:
         """获取或初始化每日统计"""
+        stats = self._daily_stats.get(day)
+        if stats is None:
+            stats = _empty_daily_stats()
+            self._put_daily_stats(day, stats)
+        return stats
+    
+    def _put_daily_stats(self, day: str, stats: dict):
+        """写入某天的统计，超出保留天数时淘汰最早的一天"""
         if day not in self._daily_stats:
-            self._daily_stats[day] = {
-                "trade_count": 0,
-                "realized_pnl": 0.0,
-                "buy_value": 0.0,
-                "sell_value": 0.0,
-            }
-        return self._daily_stats[day]
+            order = self._daily_stats_order
+            if len(order) == order.maxlen:
+                self._daily_stats.pop(order[0], None)
+            order.append(day)
+        self._daily_stats[day] = stats
     
     def _log_event(self, event_type: str, data: dict):
         """记录事件"""
-        log_file = self.data_dir / "risk_events.jsonl"
         event = {
             "timestamp": datetime.now().isoformat(),
             "event": event_type,
             "data": data
         }
-        with open(log_file, "a") as f:
-            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        self._writer.submit(self._event_log, json_dumps(event) + b"\n")
     
     def _append_trade_log(self, trade: TradeRecord):
         """追加交易日志"""
-        log_file = self.data_dir / "trades.jsonl"
-        with open(log_file, "a") as f:
-            f.write(json.dumps(trade.to_dict(), ensure_ascii=False) + "\n")
+        self._writer.submit(self._trade_log, json_dumps(trade.to_dict()) + b"\n")
+    
+    def _journal_append(self, op: str, payload: dict, key: str = None, urgent: bool = False):
+        """
+        记录一条状态变更
+        
+        同一 (op, key) 的变更在内存中合并，按次数/时间批量写入变更日志；
+        urgent=True 时立即写出。
+        """
+        self._journal_pending[(op, key)] = payload
+        if (urgent
+                or len(self._journal_pending) >= JOURNAL_FLUSH_EVERY
+                or time.monotonic() - self._journal_flushed_at >= JOURNAL_FLUSH_INTERVAL):
+            self._flush_journal()
+    
+    def _flush_journal(self):
+        """把合并后的变更写入变更日志，日志过大时合并为快照"""
+        self._journal_flushed_at = time.monotonic()
+        if not self._journal_pending:
+            return
+        data = b"".join(
+            json_dumps({"op": op, **payload}) + b"\n"
+            for (op, _), payload in self._journal_pending.items()
+        )
+        self._journal_pending.clear()
+        self._writer.submit(self._journal, data)
+        self._journal_size += len(data)
+        if self._journal_size > JOURNAL_COMPACT_BYTES:
+            self._compact_state()
+    
+    def _apply_journal_entry(self, entry: dict):
+        """重放一条状态变更记录"""
+        op = entry.get("op")
+        if op == "stop_loss":
+            i = self._symbol_id(entry["symbol"])
+            self._stops[i] = entry["v"]
+        elif op == "take_profit":
+            i = self._symbol_id(entry["symbol"])
+            self._take_profits[i] = entry["v"]
+        elif op == "daily_stats":
+            self._put_daily_stats(entry["day"], entry["v"])
+        elif op == "emergency_stop":
+            self._emergency_stop = entry["v"]
+    
+    def _compact_state(self):
+        """将当前状态写为快照并清空变更日志"""
+        self._journal_pending.clear()  # 快照已包含这些变更
+        self._writer.flush()  # 先让已入队的变更记录落盘，再截断
+        self._save_state()
+        self._journal.close()
+        self._journal.path.write_bytes(b"")
+        self._journal_size = 0
     
     def _save_state(self):
-        """保存状态"""
-        state_file = self.data_dir / "risk_state.json"
+        """保存状态快照 (先写临时文件再替换，避免写到一半损坏)"""
         state = {
             "emergency_stop": self._emergency_stop,
             "daily_stats": self._daily_stats,
-            "position_stops": self._position_stops,
+            "position_stops": self._position_stops_dict(),
         }
-        with open(state_file, "w") as f:
-            json.dump(state, f, indent=2, ensure_ascii=False)
+        self._state_tmp_path.write_bytes(json_dumps(state, indent=True))
+        os.replace(self._state_tmp_path, self._state_path)
     
     def _load_state(self):
-        """加载状态"""
-        state_file = self.data_dir / "risk_state.json"
+        """加载状态: 读取快照后重放变更日志"""
+        state_file = self._state_path
         if state_file.exists():
             try:
-                with open(state_file, "r") as f:
-                    state = json.load(f)
-                    self._emergency_stop = state.get("emergency_stop", False)
-                    self._daily_stats = state.get("daily_stats", {})
-                    self._position_stops = state.get("position_stops", {})
+                state = json_loads(state_file.read_bytes())
+                self._emergency_stop = state.get("emergency_stop", False)
+                daily_stats = state.get("daily_stats", {})
+                for day in sorted(daily_stats)[-DAILY_STATS_KEEP_DAYS:]:
+                    self._put_daily_stats(day, daily_stats[day])
+                for symbol, stops in state.get("position_stops", {}).items():
+                    i = self._symbol_id(symbol)
+                    if stops.get("stop_loss") is not None:
+                        self._stops[i] = stops["stop_loss"]
+                    if stops.get("take_profit") is not None:
+                        self._take_profits[i] = stops["take_profit"]
             except Exception as e:
                 print(f"⚠️ 加载风控状态失败: {e}")
+        
+        journal_file = self._journal.path
+        if not journal_file.exists():
+            return
+        
+        replayed = 0
+        for raw in journal_file.read_bytes().splitlines():
+            if not raw.strip():
+                continue
+            try:
+                self._apply_journal_entry(json_loads(raw))
+                replayed += 1
+            except Exception:
+                # 进程中断时最后一行可能不完整，跳过即可
+                continue
+        
+        # 启动时把上次运行累积的变更合并进快照
+        if replayed:
+            self._compact_state()
 
 
 # 单例
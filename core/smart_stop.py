@@ -9,31 +9,120 @@
 组合决策: 三个策略投票，多数通过才触发止损
 新特性: 支持基于 Beta 值的自适应风控模式
 """
+import io
 import os
+import time
+import logging
+import threading
 import numpy as np
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from itertools import chain
 from dataclasses import dataclass, field
-from typing import Optional, List, Dict, Tuple
+from typing import Optional, List, Dict, Tuple, Union, Callable
 from enum import Enum
 
+from ._smart_stop_numba import _atr_loop, _vol_loop, HAS_NUMBA
+from .data import get_fetcher
+
+# 告警走 logging (参数延迟格式化，多线程扫描时不争用 stdout)；
+# 未配置 handler 时仍会输出到 stderr
+log = logging.getLogger(__name__)
+
+
+# 缓存有效期 (秒，基于 time.monotonic) 与每个缓存最多保留的条目数
+_ATR_TTL = 3600.0
+_VOL_TTL = 86400.0
+_MKT_TTL = 300.0
+_OHLC_TTL = 3600.0  # 盘中当天日K线还在变，与 ATR 同步过期
+_BAD_SYMBOL_TTL = 300.0  # K线不足或取数失败的股票在此期间不再请求
+_CACHE_MAX_SIZE = 512
+
+# scan_positions 并发评估持仓的最大线程数 (主要耗时是K线网络请求)
+_SCAN_MAX_WORKERS = 16
+
+
+def _in_close_window(minute_of_day: int) -> bool:
+    """收盘时段 (本地时间 03:30 - 05:30，对应美股收盘前后)"""
+    hour, minute = divmod(minute_of_day, 60)
+    if hour == 3 and minute >= 30: return True
+    if hour == 4: return True
+    if hour == 5 and minute <= 30: return True
+    return False
+
+
+# 一天 1440 分钟各占一位，第 m 位为 1 表示第 m 分钟处于收盘时段
+_CLOSE_MINUTE_MASK = sum(1 << m for m in range(1440) if _in_close_window(m))
+
+
+# 报告行模板
+_EXIT_LINE = "  {} {} [{}] 盈亏:{:+.1%} ({})\n"
+_VOTE_LINE = "      👉 {}\n"
+_HOLD_LINE = "  🟢 {} 盈亏:{:+.1%} | 波动率:{:.1%} | 模式:{}\n"
+
+
+def _ohlc_arrays(candles: List[Dict]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    K线 dict 列表转为 high / low / close 三个连续的列数组
+    
+    价格只需两位小数精度，存为 float32 (内存减半)，ATR / 波动率累加时用 float64
+    """
+    arr = np.fromiter(
+        chain.from_iterable((c["high"], c["low"], c["close"]) for c in candles),
+        dtype=np.float32, count=3 * len(candles)
+    ).reshape(-1, 3)
+    return tuple(np.ascontiguousarray(arr[:, j]) for j in range(3))
+
 
 class StopDecision(Enum):
-    """止损决策"""
+    """止损决策 (成员是单例，热路径上用 is 比较，不走 Enum.__eq__)"""
     HOLD = "hold"           # 持有不动
     STOP_LOSS = "stop_loss" # 触发止损
     TAKE_PROFIT = "take_profit"  # 触发止盈
 
 
-@dataclass
+@dataclass(slots=True, init=False)
 class StopVote:
-    """单个策略的投票结果"""
+    """
+    单个策略的投票结果
+    
+    说明文字需要格式化的可传入无参函数，首次读取 reason 时才生成并缓存
+    (大多数扫描只看决策，不必为每张票格式化)
+    """
     strategy: str
     decision: StopDecision
-    reason: str
     confidence: float  # 0-1，置信度
+    atr: Optional[float]         # 自适应投票用到的 ATR (供结果明细复用)
+    stop_price: Optional[float]  # 自适应投票算出的 ATR 止损价
+    _reason: Union[str, Callable[[], str]] = field(repr=False, compare=False)
+    
+    def __init__(
+        self,
+        strategy: str,
+        decision: StopDecision,
+        reason: Union[str, Callable[[], str]],
+        confidence: float,
+        atr: Optional[float] = None,
+        stop_price: Optional[float] = None
+    ):
+        self.strategy = strategy
+        self.decision = decision
+        self._reason = reason
+        self.confidence = confidence
+        self.atr = atr
+        self.stop_price = stop_price
+    
+    @property
+    def reason(self) -> str:
+        """说明文字"""
+        reason = self._reason
+        if callable(reason):
+            reason = self._reason = reason()
+        return reason
 
 
-@dataclass
+@dataclass(slots=True)
 class SmartStopResult:
     """智能止损综合结果"""
     symbol: str
@@ -45,10 +134,10 @@ class SmartStopResult:
     
     @property
     def should_exit(self) -> bool:
-        return self.final_decision in [StopDecision.STOP_LOSS, StopDecision.TAKE_PROFIT]
+        return self.final_decision is not StopDecision.HOLD
 
 
-@dataclass
+@dataclass(slots=True)
 class SmartStopConfig:
     """智能止损配置"""
     # 波动率自适应
@@ -88,85 +177,169 @@ class SmartStopManager:
     def __init__(self, config: SmartStopConfig = None, data_fetcher = None):
         self.config = config or SmartStopConfig()
         self._fetcher = data_fetcher
-        self._atr_cache: Dict[str, Tuple[float, datetime]] = {}  # symbol -> (atr, timestamp)
-        self._vol_cache: Dict[str, Tuple[float, datetime]] = {}  # symbol -> (volatility, timestamp)
-        self._market_cache: Dict[str, Tuple[float, datetime]] = {}  # benchmark -> (change_pct, timestamp)
+        # 带有效期的 LRU 缓存: key -> (value, time.monotonic())
+        self._atr_cache: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # symbol -> atr
+        self._vol_cache: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # symbol -> volatility
+        self._market_cache: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # benchmark -> change_pct
+        self._ohlc_cache: "OrderedDict[Tuple, Tuple[tuple, float]]" = OrderedDict()  # (symbol, days, date) -> (high, low, close)
+        self._bad_symbols: "OrderedDict[str, Tuple[bool, float]]" = OrderedDict()  # ATR 算不出来的股票
+        self._cache_lock = threading.Lock()  # scan_positions 多线程评估时保护上面的缓存
+        # 缓存未命中时同一股票只让一个线程去取数 (single-flight)，其他线程等它算完读缓存
+        self._symbol_locks: Dict[str, threading.Lock] = {}
+        self._market_lock = threading.Lock()
         # 最高价缓存 (用于追踪止损) - 实际应用需持久化，这里简化为内存
         self._high_water_mark: Dict[str, float] = {} 
     
+    def _cache_get(self, cache: OrderedDict, key: str, ttl: float):
+        """读取未过期的缓存值 (命中时移到队尾)，没有或已过期返回 None"""
+        with self._cache_lock:
+            entry = cache.get(key)
+            if entry is None:
+                return None
+            value, stored_at = entry
+            if time.monotonic() - stored_at >= ttl:
+                return None
+            cache.move_to_end(key)
+            return value
+    
+    def _cache_put(self, cache: OrderedDict, key: str, value: float):
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        with self._cache_lock:
+            cache[key] = (value, time.monotonic())
+            cache.move_to_end(key)
+            if len(cache) > _CACHE_MAX_SIZE:
+                cache.popitem(last=False)
+    
+    def _is_bad_symbol(self, symbol: str) -> bool:
+        return self._cache_get(self._bad_symbols, symbol, _BAD_SYMBOL_TTL) is not None
+    
+    def _symbol_lock(self, symbol: str) -> threading.Lock:
+        with self._cache_lock:
+            lock = self._symbol_locks.get(symbol)
+            if lock is None:
+                lock = self._symbol_locks[symbol] = threading.Lock()
+            return lock
+    
     @property
     def fetcher(self):
         if self._fetcher is None:
-            from .data import get_fetcher
             self._fetcher = get_fetcher()
         return self._fetcher
     
-    def calculate_volatility(self, symbol: str) -> float:
-        """计算年化波动率"""
-        if symbol in self._vol_cache:
-            cached_vol, cached_time = self._vol_cache[symbol]
-            if datetime.now() - cached_time < timedelta(days=1):
+    def calculate_volatility(self, symbol: str, candles: List[Dict] = None) -> float:
+        """计算年化波动率 (candles 为已获取的日K线时不再请求数据)"""
+        if candles is not None:
+            return self._compute_volatility(symbol, _ohlc_arrays(candles))
+        
+        cached_vol = self._cache_get(self._vol_cache, symbol, _VOL_TTL)
+        if cached_vol is not None:
+            return cached_vol
+        with self._symbol_lock(symbol):
+            cached_vol = self._cache_get(self._vol_cache, symbol, _VOL_TTL)  # 等锁期间可能已被其他线程算好
+            if cached_vol is not None:
                 return cached_vol
-                
+            if self._is_bad_symbol(symbol):
+                return 0.0
+            return self._compute_volatility(symbol, None)
+    
+    def _kline_days(self) -> int:
+        """波动率 (100 天) 与 ATR (period + 10 天) 共用一次日K线请求的天数"""
+        return max(100, self.config.atr_period + 10)
+    
+    def _get_ohlc_arrays(self, symbol: str, days: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """获取日K线并转为列数组，按 (symbol, days, 日期) 缓存"""
+        key = (symbol, days, date.today())
+        ohlc = self._cache_get(self._ohlc_cache, key, _OHLC_TTL)
+        if ohlc is None:
+            ohlc = _ohlc_arrays(self.fetcher.get_kline_df(symbol, days=days))
+            self._cache_put(self._ohlc_cache, key, ohlc)
+        return ohlc
+    
+    def _compute_volatility(self, symbol: str, ohlc: Optional[Tuple[np.ndarray, ...]]) -> float:
         try:
-            candles = self.fetcher.get_kline_df(symbol, days=100)
-            if len(candles) < 30:
+            if ohlc is None:
+                ohlc = self._get_ohlc_arrays(symbol, self._kline_days())
+            closes = ohlc[2]
+            if len(closes) < 30:
                 return 0.0
             
-            closes = [c["close"] for c in candles]
-            returns = np.diff(closes) / closes[:-1]
-            volatility = np.std(returns) * np.sqrt(252)
+            if HAS_NUMBA:
+                volatility = float(_vol_loop(closes))
+            else:
+                returns = np.diff(closes) / closes[:-1]
+                volatility = float(np.std(returns, dtype=np.float64) * np.sqrt(252))
             
-            self._vol_cache[symbol] = (volatility, datetime.now())
+            self._cache_put(self._vol_cache, symbol, volatility)
             return volatility
         except Exception as e:
-            print(f"⚠️ 计算波动率失败 {symbol}: {e}")
+            log.warning("⚠️ 计算波动率失败 %s: %s", symbol, e)
+            self._cache_put(self._bad_symbols, symbol, True)
             return 0.0
 
     # ==================== 策略1: 波动率自适应止损 ====================
     
-    def calculate_atr(self, symbol: str, period: int = None) -> float:
+    def calculate_atr(self, symbol: str, period: int = None, candles: List[Dict] = None) -> float:
+        """计算 ATR (candles 为已获取的日K线时不再请求数据)"""
         period = period or self.config.atr_period
         
-        if symbol in self._atr_cache:
-            cached_atr, cached_time = self._atr_cache[symbol]
-            if datetime.now() - cached_time < timedelta(hours=1):
-                return cached_atr
+        if candles is not None:
+            return self._compute_atr(symbol, period, _ohlc_arrays(candles))
         
+        cached_atr = self._cache_get(self._atr_cache, symbol, _ATR_TTL)
+        if cached_atr is not None:
+            return cached_atr
+        with self._symbol_lock(symbol):
+            cached_atr = self._cache_get(self._atr_cache, symbol, _ATR_TTL)
+            if cached_atr is not None:
+                return cached_atr
+            if self._is_bad_symbol(symbol):
+                return 0
+            return self._compute_atr(symbol, period, None)
+    
+    def _compute_atr(self, symbol: str, period: int, ohlc: Optional[Tuple[np.ndarray, ...]]) -> float:
         try:
-            candles = self.fetcher.get_kline_df(symbol, days=period + 10)
-            if len(candles) < period + 1:
+            if ohlc is None:
+                ohlc = self._get_ohlc_arrays(symbol, max(self._kline_days(), period + 10))
+            if len(ohlc[2]) < period + 1:
+                self._cache_put(self._bad_symbols, symbol, True)
                 return 0
             
-            tr_list = []
-            for i in range(1, len(candles)):
-                high = candles[i]["high"]
-                low = candles[i]["low"]
-                prev_close = candles[i-1]["close"]
-                tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
-                tr_list.append(tr)
-            
-            atr = sum(tr_list[-period:]) / period
-            self._atr_cache[symbol] = (atr, datetime.now())
+            # 只有最后 period + 1 根参与计算
+            high, low, close = (a[-(period + 1):] for a in ohlc)
+            if HAS_NUMBA:
+                atr = float(_atr_loop(high, low, close, period))
+            else:
+                prev_close = close[:-1]
+                high, low = high[1:], low[1:]
+                tr = np.maximum.reduce([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+                atr = float(tr.mean(dtype=np.float64))
+            self._cache_put(self._atr_cache, symbol, atr)
             return atr
-        except Exception:
+        except Exception as e:
+            log.debug("计算 ATR 失败 %s: %s", symbol, e)
+            self._cache_put(self._bad_symbols, symbol, True)
             return 0
     
     def vote_adaptive_risk(
         self, 
         symbol: str, 
         cost_price: float, 
-        current_price: float
+        current_price: float,
+        atr: float = None,
+        volatility: float = None
     ) -> StopVote:
         """
         自适应风控核心逻辑 (统一使用 ATR + 追踪止盈)
+        
+        atr / volatility 由调用方算好时直接传入，避免重复计算；
+        ATR 只有在追踪止盈未触发时才需要，未传入时到那一步才计算
         """
         if not self.config.enable_adaptive_risk:
             return StopVote("自适应风控", StopDecision.HOLD, "未启用", 0)
 
         # 1. 基础数据
-        volatility = self.calculate_volatility(symbol)
-        atr = self.calculate_atr(symbol)
+        if volatility is None:
+            volatility = self.calculate_volatility(symbol)
         
         # 更新最高价 (水位线)
         if symbol not in self._high_water_mark or current_price > self._high_water_mark[symbol]:
@@ -184,47 +357,54 @@ class SmartStopManager:
                 return StopVote(
                     strategy="自适应(追踪)",
                     decision=StopDecision.TAKE_PROFIT,
-                    reason=f"追踪止盈触发 (最高盈:{highest_pnl:.1%} 回撤:{drawdown:.1%})",
+                    reason=lambda: f"追踪止盈触发 (最高盈:{highest_pnl:.1%} 回撤:{drawdown:.1%})",
                     confidence=1.0
                 )
         
         # 3. ATR 止损 (统一应用)
         # 止损线 = 成本价 - ATR * 倍数
+        if atr is None:
+            atr = self.calculate_atr(symbol)
+        if atr <= 0:
+            # K线不足或取数失败时止损线会退化成成本价，不据此给出止损票
+            return StopVote("自适应(风控)", StopDecision.HOLD, "数据不足", 0)
         stop_price = cost_price - (atr * self.config.atr_multiplier)
         if current_price < stop_price:
             return StopVote(
                 strategy="自适应(ATR)",
                 decision=StopDecision.STOP_LOSS,
-                reason=f"触及ATR止损线 {stop_price:.2f} (ATR={atr:.2f})",
-                confidence=0.9
+                reason=lambda: f"触及ATR止损线 {stop_price:.2f} (ATR={atr:.2f})",
+                confidence=0.9,
+                atr=atr,
+                stop_price=stop_price
             )
             
         return StopVote(
             strategy="自适应(风控)",
             decision=StopDecision.HOLD,
-            reason=f"状态安全 (ATR止损:{stop_price:.2f}, 波动率:{volatility:.1%})",
-            confidence=0.5
+            reason=lambda: f"状态安全 (ATR止损:{stop_price:.2f}, 波动率:{volatility:.1%})",
+            confidence=0.5,
+            atr=atr,
+            stop_price=stop_price
         )
 
     # ==================== 策略2: 收盘价止损 (保留作为辅助) ====================
     
     def is_near_market_close(self) -> bool:
         now = datetime.now()
-        hour = now.hour
-        minute = now.minute
-        if hour == 3 and minute >= 30: return True
-        if hour == 4: return True
-        if hour == 5 and minute <= 30: return True
-        return False
+        return bool((_CLOSE_MINUTE_MASK >> (now.hour * 60 + now.minute)) & 1)
     
     def vote_close_only(
         self,
         symbol: str,
         cost_price: float,
         current_price: float,
-        force_check: bool = False
+        force_check: bool = False,
+        near_close: bool = None
     ) -> StopVote:
-        is_close_time = self.is_near_market_close() or force_check
+        if near_close is None:
+            near_close = self.is_near_market_close()
+        is_close_time = near_close or force_check
         
         if not is_close_time and self.config.use_close_only:
             return StopVote("收盘价止损", StopDecision.HOLD, "非收盘时段", 1.0)
@@ -232,7 +412,7 @@ class SmartStopManager:
         # 兼容旧逻辑，使用固定8%作为硬止损
         stop_price = cost_price * (1 - 0.08)
         if current_price <= stop_price:
-            return StopVote("收盘价止损", StopDecision.STOP_LOSS, f"收盘破位 {stop_price:.2f}", 0.85)
+            return StopVote("收盘价止损", StopDecision.STOP_LOSS, lambda: f"收盘破位 {stop_price:.2f}", 0.85)
             
         return StopVote("收盘价止损", StopDecision.HOLD, "安全", 0.5)
     
@@ -240,21 +420,31 @@ class SmartStopManager:
     
     def get_market_change(self) -> float:
         benchmark = self.config.market_benchmark
-        if benchmark in self._market_cache:
-            cached, time = self._market_cache[benchmark]
-            if datetime.now() - time < timedelta(minutes=5): return cached
-        try:
-            quotes = self.fetcher.get_quote_with_change([benchmark])
-            if quotes:
-                change = quotes[0]["change_pct"] / 100
-                self._market_cache[benchmark] = (change, datetime.now())
-                return change
-        except Exception:
-            pass
+        cached = self._cache_get(self._market_cache, benchmark, _MKT_TTL)
+        if cached is not None: return cached
+        with self._market_lock:
+            cached = self._cache_get(self._market_cache, benchmark, _MKT_TTL)
+            if cached is not None: return cached
+            try:
+                quotes = self.fetcher.get_quote_with_change([benchmark])
+                if quotes:
+                    change = quotes[0]["change_pct"] / 100
+                    self._cache_put(self._market_cache, benchmark, change)
+                    return change
+            except Exception as e:
+                log.debug("获取大盘涨跌幅失败 %s: %s", benchmark, e)
         return 0
     
-    def vote_relative_market(self, symbol: str, cost_price: float, current_price: float) -> StopVote:
-        market_change = self.get_market_change()
+    def vote_relative_market(
+        self,
+        symbol: str,
+        cost_price: float,
+        current_price: float,
+        market_change: float = None
+    ) -> StopVote:
+        """market_change: 大盘涨跌幅 (批量扫描时由调用方统一获取一次传入)"""
+        if market_change is None:
+            market_change = self.get_market_change()
         stock_change = (current_price - cost_price) / cost_price
         excess_drop = stock_change - market_change
         
@@ -265,7 +455,7 @@ class SmartStopManager:
             adjusted_stop = base_stop
             
         if excess_drop < -adjusted_stop:
-            return StopVote("相对大盘", StopDecision.STOP_LOSS, f"超额跌幅 {excess_drop:.1%}", 0.75)
+            return StopVote("相对大盘", StopDecision.STOP_LOSS, lambda: f"超额跌幅 {excess_drop:.1%}", 0.75)
             
         return StopVote("相对大盘", StopDecision.HOLD, "正常", 0.5)
     
@@ -276,36 +466,53 @@ class SmartStopManager:
         symbol: str,
         cost_price: float,
         current_price: float,
-        force_close_check: bool = False
+        force_close_check: bool = False,
+        near_close: bool = None,
+        market_change: float = None
     ) -> SmartStopResult:
         """
         综合决策
+        
+        near_close: 是否处于收盘时段 (批量扫描时由调用方统一判断一次传入)
+        market_change: 大盘涨跌幅 (同上)
         """
+        if near_close is None:
+            near_close = self.is_near_market_close()
+        
+        # 波动率每个持仓只算一次，供投票和结果明细共用；
+        # ATR 由投票按需计算 (追踪止盈已触发的持仓不必获取K线算 ATR)
+        vol = self.calculate_volatility(symbol)
+        
         # 1. 自适应风控投票 (权重最高)
-        adaptive_vote = self.vote_adaptive_risk(symbol, cost_price, current_price)
+        adaptive_vote = self.vote_adaptive_risk(symbol, cost_price, current_price, volatility=vol)
         
         # 2. 其他辅助投票
-        close_vote = self.vote_close_only(symbol, cost_price, current_price, force_close_check)
-        relative_vote = self.vote_relative_market(symbol, cost_price, current_price)
+        close_vote = self.vote_close_only(symbol, cost_price, current_price, force_close_check, near_close)
+        relative_vote = self.vote_relative_market(symbol, cost_price, current_price, market_change)
         
         votes = [adaptive_vote, close_vote, relative_vote]
         
         # 决策逻辑: 自适应风控有一票否决权 (如果是止损/止盈)
-        if adaptive_vote.decision != StopDecision.HOLD:
+        if adaptive_vote.decision is not StopDecision.HOLD:
             final_decision = adaptive_vote.decision
         else:
             # 如果自适应觉得没问题，再看其他策略是否强烈建议止损 (且是收盘时)
-            stop_votes = sum(1 for v in votes if v.decision == StopDecision.STOP_LOSS)
-            if stop_votes >= 2 and (self.is_near_market_close() or force_close_check):
+            # 自适应票此时为 HOLD，只需统计两张辅助票
+            stop_loss = StopDecision.STOP_LOSS
+            stop_votes = (close_vote.decision is stop_loss) + (relative_vote.decision is stop_loss)
+            if stop_votes >= 2 and (near_close or force_close_check):
                 final_decision = StopDecision.STOP_LOSS
             else:
                 final_decision = StopDecision.HOLD
         
+        # ATR 与止损价直接取自适应投票的结果 (未计算时为 NaN)
+        atr = adaptive_vote.atr if adaptive_vote.atr is not None else float("nan")
+        atr_stop = adaptive_vote.stop_price if adaptive_vote.stop_price is not None else float("nan")
+        
         vote_summary = f"主策略:{adaptive_vote.decision.value} | 辅助:{close_vote.decision.value}/{relative_vote.decision.value}"
         pnl_pct = (current_price - cost_price) / cost_price
         
         # 提取模式描述
-        vol = self.calculate_volatility(symbol)
         vol_tag = "高波" if vol > self.config.high_volatility_threshold else "稳健"
         mode_desc = f"{vol_tag}(ATR+追踪)"
         
@@ -317,12 +524,21 @@ class SmartStopManager:
             details={
                 "pnl_pct": pnl_pct,
                 "volatility": vol,
+                "atr": atr,
+                "atr_stop": atr_stop,
                 "mode": mode_desc,
                 "current_price": current_price
             },
             risk_mode=mode_desc
         )
     
+    def _map_io(self, func, items: List) -> List:
+        """对每个元素调用 func (通常需要网络取数)，多个时用线程池并发，结果保持顺序"""
+        if len(items) <= 1:
+            return [func(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(_SCAN_MAX_WORKERS, len(items))) as executor:
+            return list(executor.map(func, items))
+    
     def scan_positions(
         self,
         positions: List[Dict],
@@ -330,58 +546,131 @@ class SmartStopManager:
         force_close_check: bool = False
     ) -> List[SmartStopResult]:
         if quotes is None:
+            # 基准指数与持仓一起请求，顺便填充大盘涨跌幅缓存，省去单独一次行情请求
+            benchmark = self.config.market_benchmark
             symbols = [p["symbol"] for p in positions]
+            if benchmark not in symbols:
+                symbols.append(benchmark)
             quote_list = self.fetcher.get_quote_with_change(symbols)
-            quotes = {q["symbol"]: q["price"] for q in quote_list}
+            quotes = {}
+            for q in quote_list:
+                quotes[q["symbol"]] = q["price"]
+                if q["symbol"] == benchmark:
+                    self._cache_put(self._market_cache, benchmark, q["change_pct"] / 100)
         
-        results = []
+        self._prefetch_candles([p["symbol"] for p in positions])
+        
+        near_close = self.is_near_market_close()
+        # 大盘涨跌幅整轮扫描只取一次 (行情请求失败时也不会每个持仓各重试一次)
+        market_change = self.get_market_change()
+        
+        work = []
         for pos in positions:
             symbol = pos["symbol"]
-            cost_price = pos["cost_price"]
             current_price = quotes.get(symbol, 0)
-            
             if current_price <= 0: continue
-            
-            result = self.evaluate(symbol, cost_price, current_price, force_close_check)
-            results.append(result)
+            work.append((symbol, pos["cost_price"], current_price))
+        
+        def evaluate_one(item):
+            symbol, cost_price, current_price = item
+            return self.evaluate(symbol, cost_price, current_price, force_close_check, near_close, market_change)
         
-        return results
+        # 缓存未命中时每个持仓都要请求K线，多线程并发请求 (结果保持持仓顺序)
+        return self._map_io(evaluate_one, work)
+    
+    def _prefetch_candles(self, symbols: List[str]):
+        """
+        数据源支持批量K线接口 (get_kline_df_batch) 时，一次请求所有持仓的日K线，
+        预先填充 ATR / 波动率缓存，避免逐只请求；批量中获取失败的标的留给逐只路径重试
+        """
+        batch_fetch = getattr(self.fetcher, "get_kline_df_batch", None)
+        if batch_fetch is None:
+            return
+        symbols = [
+            s for s in symbols
+            if self._cache_get(self._atr_cache, s, _ATR_TTL) is None
+            or self._cache_get(self._vol_cache, s, _VOL_TTL) is None
+        ]
+        if not symbols:
+            return
+        days = self._kline_days()
+        try:
+            candles_by_symbol = batch_fetch(symbols, days=days, max_workers=_SCAN_MAX_WORKERS)
+        except Exception as e:
+            log.warning("⚠️ 批量获取K线失败: %s", e)
+            return
+        period = self.config.atr_period
+        today = date.today()
+        for symbol, candles in candles_by_symbol.items():
+            ohlc = _ohlc_arrays(candles)  # 转换一次，ATR 和波动率共用
+            self._cache_put(self._ohlc_cache, (symbol, days, today), ohlc)
+            self._compute_atr(symbol, period, ohlc)
+            self._compute_volatility(symbol, ohlc)
     
-    def generate_report(self, results: List[SmartStopResult]) -> str:
-        lines = []
-        lines.append("=" * 60)
-        lines.append(f"🧠 智能止损分析报告 (自适应版) - {datetime.now().strftime('%H:%M:%S')}")
-        lines.append("=" * 60)
+    def generate_report(
+        self,
+        results: List[SmartStopResult],
+        sections: Tuple[str, ...] = ("exits", "holds")
+    ) -> str:
+        """
+        生成报告文本
+
+        sections 选择输出的部分: "exits" 需要操作的持仓，"holds" 持仓监控；
+        只关心告警时传 ("exits",)，持仓全部健康时可省去大部分渲染
+        """
+        buf = io.StringIO()
+        write = buf.write
+        write("=" * 60 + "\n")
+        write(f"🧠 智能止损分析报告 (自适应版) - {datetime.now().strftime('%H:%M:%S')}\n")
+        write("=" * 60 + "\n")
         
-        exit_results = [r for r in results if r.should_exit]
-        hold_results = [r for r in results if not r.should_exit]
+        if "exits" in sections:
+            self._render_exit_section(results, write)
+        if "holds" in sections:
+            self._render_hold_section(results, write)
         
-        if exit_results:
-            lines.append("🚨 需要操作:")
-            for r in exit_results:
-                action = "止损" if r.final_decision == StopDecision.STOP_LOSS else "止盈"
-                emoji = "🔴" if action == "止损" else "🟢"
-                lines.append(f"  {emoji} {r.symbol} [{action}] 盈亏:{r.details['pnl_pct']:+.1%} ({r.risk_mode})")
-                for v in r.votes:
-                    if v.decision != StopDecision.HOLD:
-                        lines.append(f"      👉 {v.reason}")
-        else:
-            lines.append("✅ 无需操作")
+        write("=" * 60)
+        return buf.getvalue()
+    
+    @staticmethod
+    def _render_exit_section(results: List[SmartStopResult], write: Callable[[str], int]):
+        exit_results = [r for r in results if r.should_exit]
+        if not exit_results:
+            write("✅ 无需操作\n")
+            return
         
-        if hold_results:
-            lines.append("\n📋 持仓监控:")
-            for r in hold_results:
-                vol = r.details.get('volatility', 0)
-                lines.append(f"  🟢 {r.symbol} 盈亏:{r.details['pnl_pct']:+.1%} | 波动率:{vol:.1%} | 模式:{r.risk_mode}")
+        write("🚨 需要操作:\n")
+        for r in exit_results:
+            if r.final_decision is StopDecision.STOP_LOSS:
+                emoji, action = "🔴", "止损"
+            else:
+                emoji, action = "🟢", "止盈"
+            write(_EXIT_LINE.format(emoji, r.symbol, action, r.details['pnl_pct'], r.risk_mode))
+            for v in r.votes:
+                if v.decision is not StopDecision.HOLD:
+                    write(_VOTE_LINE.format(v.reason))
+    
+    @staticmethod
+    def _render_hold_section(results: List[SmartStopResult], write: Callable[[str], int]):
+        hold_results = [r for r in results if not r.should_exit]
+        if not hold_results:
+            return
         
-        lines.append("=" * 60)
-        return "\n".join(lines)
+        write("\n📋 持仓监控:\n")
+        for r in hold_results:
+            write(_HOLD_LINE.format(r.symbol, r.details['pnl_pct'], r.details.get('volatility', 0), r.risk_mode))
 
 
 _smart_stop_manager: Optional[SmartStopManager] = None
+_smart_stop_manager_lock = threading.Lock()
 
 def get_smart_stop_manager(config: SmartStopConfig = None) -> SmartStopManager:
     global _smart_stop_manager
-    if _smart_stop_manager is None:
-        _smart_stop_manager = SmartStopManager(config=config)
-    return _smart_stop_manager
+    manager = _smart_stop_manager
+    if manager is not None:
+        return manager
+    # 多线程首次调用时只创建一个实例，缓存才能在线程间共用
+    with _smart_stop_manager_lock:
+        if _smart_stop_manager is None:
+            _smart_stop_manager = SmartStopManager(config=config)
+        return _smart_stop_manager
@@ -2,27 +2,94 @@
 交易执行模块（集成风控）
 """
 import os
-import uuid
+import sys
+import time
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional
+from operator import attrgetter
+from typing import Optional, Tuple, Dict, List
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from longport.openapi import (
-    Config, TradeContext, 
-    OrderSide, OrderType, TimeInForceType,
-    OutsideRTH
-)
+# longport SDK 在首次需要交易连接或实际下单时才导入
 
+from .data import get_fetcher
 from .risk import get_risk_manager, RiskConfig, TradeRecord
 
+# 账户余额 / 持仓缓存有效期 (秒)：连续下单时每单的风控检查复用同一次查询，
+# 订单提交成功后两者都会失效
+BALANCE_CACHE_TTL = 5.0
+POSITIONS_CACHE_TTL = 2.0
+# submit_orders_bulk 同时发出的下单请求数
+BULK_SUBMIT_WORKERS = 8
+# 持仓报价缓存有效期 (秒)：止损检查与风险报告接连调用时复用
+QUOTE_CACHE_TTL = 2.0
+
+
+# 内部订单编号: 进程启动时间 + 进程号作前缀，后接递增序号
+_order_id_prefix = f"{int(time.time()):x}{os.getpid():x}"
+_order_counter = itertools.count()
+
+# 持仓对象上 get_positions 需要的固定字段
+_position_fields = attrgetter("symbol", "quantity", "available_quantity", "cost_price")
+
+
+# 进程内共用的长桥配置与交易上下文：所有 Trader 复用同一个连接，首次使用时创建
+_config = None
+_trade_ctx = None
+_trade_ctx_lock = threading.Lock()
+
+
+def get_trade_config():
+    """长桥 API 配置（进程内共用，首次调用时从环境变量加载）"""
+    global _config
+    config = _config
+    if config is not None:
+        return config
+    with _trade_ctx_lock:
+        if _config is None:
+            from longport.openapi import Config
+            _config = Config.from_env()
+        return _config
+
+
+def get_trade_context():
+    """
+    交易上下文（进程内共用，首次调用时建立连接）
+    
+    SDK 在同一连接上复用请求，上下文可在多线程间共用 (submit_orders_bulk 即并发调用)
+    """
+    global _trade_ctx
+    ctx = _trade_ctx
+    if ctx is not None:
+        return ctx
+    config = get_trade_config()
+    with _trade_ctx_lock:
+        if _trade_ctx is None:
+            from longport.openapi import TradeContext
+            _trade_ctx = TradeContext(config)
+        return _trade_ctx
+
+
+def _price_to_decimal(price: float) -> Decimal:
+    """两位小数的价格转为 Decimal (按分取整后移位，不经过字符串解析)"""
+    return Decimal(round(price * 100)).scaleb(-2)
+
 
 class Trader:
     """交易执行器（带风控）"""
     
-    def __init__(self, dry_run: bool = False, risk_config: RiskConfig = None):
+    def __init__(
+        self,
+        dry_run: bool = False,
+        risk_config: RiskConfig = None,
+        verbose: bool = True,
+        record_dry_run: bool = True
+    ):
         """
         初始化交易器
         
@@ -31,10 +98,20 @@ class Trader:
                     - False: 调用真实API（模拟盘或实盘取决于API凭证）
                     - True: 不调用API，仅打印
             risk_config: 风控配置
+            verbose: 是否输出下单/止损等状态信息；回测或批量模拟时设为 False，
+                     结果仍在返回的订单字典中
+            record_dry_run: dry_run 下单是否写入交易记录；回测时设为 False，
+                            模拟订单不进入交易日志和当日统计
         """
-        self.config = Config.from_env()
-        self.trade_ctx = TradeContext(self.config)
         self.dry_run = dry_run
+        self.verbose = verbose
+        self.record_dry_run = record_dry_run
+        self._balance_cache: Optional[Tuple[list, float]] = None  # (余额列表, time.monotonic())
+        self._positions_cache: Optional[Tuple[list, float]] = None  # (持仓列表, time.monotonic())
+        self._quotes_cache: Dict[str, Tuple[float, float]] = {}   # symbol -> (价格, time.monotonic())
+        self._trade_buffer: List[TradeRecord] = []  # defer_record 时暂存的交易记录，由 flush_trades 写入
+        self._market_val_attr: Optional[str] = None  # 持仓市值字段名，首次获取持仓时探测
+        self._output: Optional[List[str]] = None  # 批量执行期间暂存的输出行
         
         # 检测账户类型（通过环境变量或API）
         self.account_type = os.getenv("LONGPORT_ACCOUNT_TYPE", "paper")  # paper 或 live
@@ -43,15 +120,62 @@ class Trader:
         self.risk = get_risk_manager(config=risk_config)
         
         if self.dry_run:
-            print("🔔 交易器已启动 [测试模式 - 不调用API]")
+            self._say("🔔 交易器已启动 [测试模式 - 不调用API]")
         elif self.account_type == "live":
-            print("⚠️ 交易器已启动 [实盘模式]")
+            self._say("⚠️ 交易器已启动 [实盘模式]")
         else:
-            print("🔔 交易器已启动 [模拟盘]")
+            self._say("🔔 交易器已启动 [模拟盘]")
+    
+    # 连接相关对象均在首次使用时才创建，仅构造交易器或 dry_run 下单时不加载 SDK、不建立连接；
+    # 同一进程内的多个交易器共用一个连接
     
-    def get_account_balance(self) -> list:
-        """获取账户余额"""
-        return self.trade_ctx.account_balance()
+    @property
+    def config(self):
+        """长桥 API 配置"""
+        return get_trade_config()
+    
+    @property
+    def trade_ctx(self):
+        """交易上下文"""
+        return get_trade_context()
+    
+    def _say(self, line: str):
+        """输出一行状态信息 (批量执行止损止盈时先暂存，结束后一次写出；verbose=False 时不输出)"""
+        if not self.verbose:
+            return
+        if self._output is not None:
+            self._output.append(line)
+        else:
+            print(line)
+    
+    def get_account_balance(self, use_cache: bool = True) -> list:
+        """获取账户余额 (BALANCE_CACHE_TTL 秒内复用上次查询结果)"""
+        now = time.monotonic()
+        cached = self._balance_cache
+        if use_cache and cached is not None and now - cached[1] < BALANCE_CACHE_TTL:
+            return cached[0]
+        balances = self.trade_ctx.account_balance()
+        self._balance_cache = (balances, now)
+        return balances
+    
+    def invalidate_account_cache(self):
+        """清除余额与持仓缓存 (下单成交后账户已变化)"""
+        self._balance_cache = None
+        self._positions_cache = None
+    
+    def get_account_snapshot(self, with_quotes: bool = False) -> dict:
+        """
+        账户快照 {"balance": USD 总余额, "positions": 持仓列表}
+        
+        批量下单时取一次快照传给 submit_order(account_snapshot=...)，各单风控检查共用；
+        with_quotes=True 时再附带持仓报价 "quotes" {symbol: price}，
+        供 get_risk_report / check_and_execute_stops 共用同一份账户与行情
+        """
+        positions = self.get_positions()
+        snapshot = {"balance": self.get_total_balance("USD"), "positions": positions}
+        if with_quotes:
+            snapshot["quotes"] = self._get_position_quotes(positions) if positions else {}
+        return snapshot
     
     def get_total_balance(self, currency: str = "USD") -> float:
         """获取指定币种的总余额，如果没有则按汇率换算"""
@@ -85,31 +209,52 @@ class Trader:
         
         return 0.0
     
-    def get_positions(self) -> list:
-        """获取持仓"""
+    def get_positions(self, use_cache: bool = True) -> list:
+        """获取持仓 (POSITIONS_CACHE_TTL 秒内复用上次查询结果)"""
+        now = time.monotonic()
+        cached = self._positions_cache
+        if use_cache and cached is not None and now - cached[1] < POSITIONS_CACHE_TTL:
+            return cached[0]
+        result = self._fetch_positions()
+        self._positions_cache = (result, now)
+        return result
+    
+    def _fetch_positions(self) -> list:
         positions = self.trade_ctx.stock_positions()
         result = []
         if positions.channels:
             for channel in positions.channels:
                 for pos in channel.positions:
-                    # market_value 是持仓市值，用 market 字段可能是 Market 枚举
-                    # 正确字段应该是 market_val（市值）
-                    market_val = getattr(pos, 'market_val', None) or getattr(pos, 'market_value', None)
-                    if market_val is None:
-                        # 如果没有市值字段，用 cost_price * quantity 估算
-                        market_val = float(pos.cost_price) * int(pos.quantity)
-                    else:
-                        market_val = float(market_val)
+                    symbol, quantity, available, cost_price = _position_fields(pos)
+                    quantity = int(quantity)
+                    cost_price = float(cost_price)
+                    
+                    # 持仓市值字段，没有时用 cost_price * quantity 估算
+                    market_val = self._get_market_val(pos)
+                    market_val = float(market_val) if market_val else cost_price * quantity
                     
                     result.append({
-                        "symbol": pos.symbol,
-                        "quantity": int(pos.quantity),
-                        "available": int(pos.available_quantity),
-                        "cost_price": float(pos.cost_price),
+                        "symbol": symbol,
+                        "quantity": quantity,
+                        "available": int(available),
+                        "cost_price": cost_price,
                         "market_value": market_val,
                     })
         return result
     
+    def _get_market_val(self, pos):
+        """
+        读取持仓市值
+        
+        市值字段应该是 market_val（market 可能是 Market 枚举），部分版本为 market_value；
+        持仓对象类型固定，字段名第一次探测后记住
+        """
+        attr = self._market_val_attr
+        if attr is None:
+            attr = next((a for a in ("market_val", "market_value") if hasattr(pos, a)), "")
+            self._market_val_attr = attr
+        return getattr(pos, attr, None) if attr else None
+    
     def get_today_orders(self) -> list:
         """获取今日订单"""
         return self.trade_ctx.today_orders()
@@ -123,10 +268,84 @@ class Trader:
         order_type: str = "limit",  # "limit" or "market"
         skip_risk_check: bool = False,
         set_stops: bool = True,  # 买入时自动设置止损止盈
+        defer_record: bool = False,  # 交易记录先暂存，之后由 flush_trades 批量写入
+        account_snapshot: Optional[dict] = None,  # get_account_snapshot() 的结果，风控检查直接使用
     ) -> dict:
         """
         提交订单（带风控检查）
         """
+        order_info, request = self._prepare_order(
+            symbol, side, quantity, price, order_type,
+            skip_risk_check, set_stops, defer_record, account_snapshot
+        )
+        if request is None:
+            return order_info
+        
+        response, error = self._send_order(request)
+        return self._finish_order(order_info, response, error, set_stops, defer_record)
+    
+    def submit_orders_bulk(self, orders: List[dict], max_workers: int = BULK_SUBMIT_WORKERS) -> List[dict]:
+        """
+        并发提交多笔订单
+        
+        Args:
+            orders: 每项为 submit_order 的关键字参数
+            max_workers: 同时发出的下单请求数上限
+        
+        Returns:
+            与 orders 顺序一致的订单信息列表
+        
+        只有 skip_risk_check=True 的订单 (如止损卖出) 并发发出 (SDK 为阻塞调用，等待网络时
+        线程释放 GIL)。需要风控检查的订单退回逐笔 submit_order: 风控要看到前一笔已记录的
+        交易才能正确限制每日交易次数、冷却期和总仓位，不能在同一批里对着同一份状态检查。
+        """
+        results = [None] * len(orders)
+        pending = []  # (下标, order_info, request, set_stops, defer_record)
+        for i, kwargs in enumerate(orders):
+            if not kwargs.get("skip_risk_check", False):
+                results[i] = self.submit_order(**kwargs)
+                continue
+            order_info, request = self._prepare_order(
+                kwargs["symbol"], kwargs["side"], kwargs["quantity"], kwargs.get("price"),
+                kwargs.get("order_type", "limit"), True,
+                kwargs.get("set_stops", True), kwargs.get("defer_record", False),
+                kwargs.get("account_snapshot")
+            )
+            if request is None:
+                results[i] = order_info
+            else:
+                pending.append((i, order_info, request, kwargs.get("set_stops", True), kwargs.get("defer_record", False)))
+        
+        if pending:
+            if len(pending) == 1:
+                outcomes = [self._send_order(pending[0][2])]
+            else:
+                with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+                    outcomes = list(executor.map(self._send_order, [p[2] for p in pending]))
+            for (i, order_info, _, set_stops, defer_record), (response, error) in zip(pending, outcomes):
+                results[i] = self._finish_order(order_info, response, error, set_stops, defer_record)
+        
+        return results
+    
+    def _prepare_order(
+        self,
+        symbol: str,
+        side: str,
+        quantity: int,
+        price: Optional[float],
+        order_type: str,
+        skip_risk_check: bool,
+        set_stops: bool,
+        defer_record: bool,
+        account_snapshot: Optional[dict],
+    ) -> Tuple[dict, Optional[dict]]:
+        """
+        下单前的处理: 风控检查、模拟模式
+        
+        Returns:
+            (order_info, request)，request 为交给 SDK 的下单参数；
+            被风控拒绝或模拟执行时 request 为 None，order_info 即最终结果
+        """
         # 修正价格精度: 美股通常为 2 位小数
         if price is not None:
             price = round(price, 2)
@@ -134,7 +353,7 @@ class Trader:
         order_value = quantity * (price or 0)
         
         order_info = {
-            "id": str(uuid.uuid4())[:8],
+            "id": f"{_order_id_prefix}-{next(_order_counter):x}",
             "symbol": symbol,
             "side": side,
             "quantity": quantity,
@@ -146,8 +365,12 @@ class Trader:
         
         # 风控检查
         if not skip_risk_check:
-            account_balance = self.get_total_balance("USD")
-            positions = self.get_positions()
+            if account_snapshot is not None:
+                account_balance = account_snapshot["balance"]
+                positions = account_snapshot["positions"]
+            else:
+                account_balance = self.get_total_balance("USD")
+                positions = self.get_positions()
             
             is_valid, message = self.risk.validate_order(
                 symbol=symbol,
@@ -161,52 +384,32 @@ class Trader:
             if not is_valid:
                 order_info["status"] = "REJECTED"
                 order_info["error"] = message
-                print(f"❌ 订单被风控拒绝: {message}")
+                self._say(f"❌ 订单被风控拒绝: {message}")
                 
                 # 记录被拒绝的交易
-                self.risk.record_trade(TradeRecord(
-                    id=order_info["id"],
-                    timestamp=order_info["time"],
-                    symbol=symbol,
-                    side=side,
-                    quantity=quantity,
-                    price=price or 0,
-                    value=order_value,
-                    status="rejected",
-                    reason=message
-                ))
+                self._record_trade(defer_record, self._trade_record(order_info, "rejected", message))
                 
-                return order_info
+                return order_info, None
         
         # 模拟模式
         if self.dry_run:
             order_info["status"] = "DRY_RUN"
             order_info["message"] = "模拟下单，未实际执行"
-            print(f"🔔 [DRY RUN] {side.upper()} {quantity} {symbol} @ {price}")
+            self._say(f"🔔 [DRY RUN] {side.upper()} {quantity} {symbol} @ {price}")
             
             # 记录模拟交易
-            self.risk.record_trade(TradeRecord(
-                id=order_info["id"],
-                timestamp=order_info["time"],
-                symbol=symbol,
-                side=side,
-                quantity=quantity,
-                price=price or 0,
-                value=order_value,
-                status="dry_run",
-                reason="模拟执行"
-            ))
+            if self.record_dry_run:
+                self._record_trade(defer_record, self._trade_record(order_info, "dry_run", "模拟执行"))
             
             # 模拟模式下也设置止损止盈（用于测试）
-            if set_stops and side.lower() == "buy" and price:
-                stop_loss, take_profit = self.risk.set_stops_from_cost(symbol, price)
-                order_info["stop_loss"] = stop_loss
-                order_info["take_profit"] = take_profit
-                print(f"   止损: {stop_loss:.2f} | 止盈: {take_profit:.2f}")
+            if set_stops:
+                self._set_stops_after_buy(order_info)
             
-            return order_info
+            return order_info, None
+        
+        # 实际下单参数
+        from longport.openapi import OrderSide, OrderType, TimeInForceType, OutsideRTH
         
-        # 实际下单
         order_side = OrderSide.Buy if side.lower() == "buy" else OrderSide.Sell
         
         if order_type.lower() == "market":
@@ -214,63 +417,83 @@ class Trader:
         else:
             lb_order_type = OrderType.LO  # 限价单
         
+        request = dict(
+            symbol=symbol,
+            order_type=lb_order_type,
+            side=order_side,
+            submitted_quantity=quantity,
+            submitted_price=_price_to_decimal(price) if price else None,
+            time_in_force=TimeInForceType.Day,
+            outside_rth=OutsideRTH.RTHOnly,
+        )
+        return order_info, request
+    
+    def _send_order(self, request: dict):
+        """调用 SDK 下单，返回 (response, error)"""
         try:
-            response = self.trade_ctx.submit_order(
-                symbol=symbol,
-                order_type=lb_order_type,
-                side=order_side,
-                submitted_quantity=quantity,
-                submitted_price=Decimal(str(price)) if price else None,
-                time_in_force=TimeInForceType.Day,
-                outside_rth=OutsideRTH.RTHOnly,
-            )
-            
-            order_info["order_id"] = response.order_id
-            order_info["status"] = "SUBMITTED"
-            print(f"✅ 订单已提交: {response.order_id}")
-            
-            # 记录交易
-            self.risk.record_trade(TradeRecord(
-                id=order_info["id"],
-                timestamp=order_info["time"],
-                symbol=symbol,
-                side=side,
-                quantity=quantity,
-                price=price or 0,
-                value=order_value,
-                order_id=response.order_id,
-                status="submitted",
-                reason=""
-            ))
-            
-            # 买入成功后设置止损止盈
-            if set_stops and side.lower() == "buy" and price:
-                stop_loss, take_profit = self.risk.set_stops_from_cost(symbol, price)
-                order_info["stop_loss"] = stop_loss
-                order_info["take_profit"] = take_profit
-                print(f"   止损: {stop_loss:.2f} | 止盈: {take_profit:.2f}")
-            
-            return order_info
-            
+            return self.trade_ctx.submit_order(**request), None
         except Exception as e:
+            return None, e
+    
+    def _finish_order(self, order_info: dict, response, error: Optional[Exception], set_stops: bool, defer_record: bool) -> dict:
+        """根据下单结果更新订单信息并记录交易"""
+        if error is not None:
             order_info["status"] = "ERROR"
-            order_info["error"] = str(e)
-            print(f"❌ 下单失败: {e}")
+            order_info["error"] = str(error)
+            self._say(f"❌ 下单失败: {error}")
             
             # 记录失败
-            self.risk.record_trade(TradeRecord(
-                id=order_info["id"],
-                timestamp=order_info["time"],
-                symbol=symbol,
-                side=side,
-                quantity=quantity,
-                price=price or 0,
-                value=order_value,
-                status="error",
-                reason=str(e)
-            ))
-            
+            self._record_trade(defer_record, self._trade_record(order_info, "error", str(error)))
             return order_info
+        
+        order_info["order_id"] = response.order_id
+        order_info["status"] = "SUBMITTED"
+        self.invalidate_account_cache()
+        self._say(f"✅ 订单已提交: {response.order_id}")
+        
+        # 记录交易
+        self._record_trade(defer_record, self._trade_record(order_info, "submitted", "", response.order_id))
+        
+        # 买入成功后设置止损止盈
+        if set_stops:
+            self._set_stops_after_buy(order_info)
+        
+        return order_info
+    
+    @staticmethod
+    def _trade_record(order_info: dict, status: str, reason: str, order_id: str = None) -> TradeRecord:
+        return TradeRecord(
+            id=order_info["id"],
+            timestamp=order_info["time"],
+            symbol=order_info["symbol"],
+            side=order_info["side"],
+            quantity=order_info["quantity"],
+            price=order_info["price"] or 0,
+            value=order_info["value"],
+            order_id=order_id,
+            status=status,
+            reason=reason
+        )
+    
+    def _set_stops_after_buy(self, order_info: dict):
+        """买入后按成交价设置止损止盈"""
+        price = order_info["price"]
+        if order_info["side"].lower() == "buy" and price:
+            stop_loss, take_profit = self.risk.set_stops_from_cost(order_info["symbol"], price)
+            order_info["stop_loss"] = stop_loss
+            order_info["take_profit"] = take_profit
+            self._say(f"   止损: {stop_loss:.2f} | 止盈: {take_profit:.2f}")
+    
+    def _record_trade(self, defer: bool, trade: TradeRecord):
+        if defer:
+            self._trade_buffer.append(trade)
+        else:
+            self.risk.record_trade(trade)
+    
+    def flush_trades(self):
+        """写入 defer_record 暂存的交易记录"""
+        trades, self._trade_buffer = self._trade_buffer, []
+        self.risk.record_trades(trades)
     
     def submit_order_with_size(
         self,
@@ -319,83 +542,114 @@ class Trader:
     def cancel_order(self, order_id: str) -> bool:
         """取消订单"""
         if self.dry_run:
-            print(f"🔔 [DRY RUN] 取消订单 {order_id}")
+            self._say(f"🔔 [DRY RUN] 取消订单 {order_id}")
             return True
         
         try:
             self.trade_ctx.cancel_order(order_id)
-            print(f"✅ 订单已取消: {order_id}")
+            self._say(f"✅ 订单已取消: {order_id}")
             return True
         except Exception as e:
-            print(f"❌ 取消失败: {e}")
+            self._say(f"❌ 取消失败: {e}")
             return False
     
-    def check_and_execute_stops(self, quotes: dict = None) -> list:
+    def check_and_execute_stops(self, quotes: dict = None, snapshot: dict = None) -> list:
         """
         检查并执行止损止盈
         
         Args:
             quotes: 实时报价 {symbol: price}，如果不传则自动获取
+            snapshot: get_account_snapshot(with_quotes=True) 的结果，传入时直接使用其中的持仓和报价
         
         Returns:
             执行的止损止盈订单列表
         """
-        positions = self.get_positions()
+        if snapshot is not None:
+            positions = snapshot["positions"]
+            if quotes is None:
+                quotes = snapshot.get("quotes")
+        else:
+            positions = self.get_positions()
         
         if not positions:
             return []
         
         # 获取报价
         if quotes is None:
-            from .data import get_fetcher
-            fetcher = get_fetcher()
-            symbols = [p["symbol"] for p in positions]
-            quote_list = fetcher.get_quote_with_change(symbols)
-            quotes = {q["symbol"]: q["price"] for q in quote_list}
+            quotes = self._get_position_quotes(positions)
         
         # 扫描需要止损止盈的持仓
         exit_signals = self.risk.scan_positions_for_exit(positions, quotes)
         
         executed_orders = []
-        
-        for risk in exit_signals:
-            if risk.should_stop_loss:
-                print(f"🔴 触发止损: {risk.symbol} @ {risk.current_price:.2f} (止损线: {risk.stop_loss_price:.2f})")
-                reason = "stop_loss"
-            else:
-                print(f"🟢 触发止盈: {risk.symbol} @ {risk.current_price:.2f} (止盈线: {risk.take_profit_price:.2f})")
-                reason = "take_profit"
-            
-            # 执行卖出
-            order = self.submit_order(
-                symbol=risk.symbol,
-                side="sell",
-                quantity=risk.quantity,
-                price=risk.current_price,
-                order_type="limit",
-                skip_risk_check=True,  # 止损止盈不受风控限制
-                set_stops=False
-            )
+        self._output = []
+        try:
+            reasons = []
+            sell_orders = []
+            for risk in exit_signals:
+                if risk.should_stop_loss:
+                    self._say(f"🔴 触发止损: {risk.symbol} @ {risk.current_price:.2f} (止损线: {risk.stop_loss_price:.2f})")
+                    reasons.append("stop_loss")
+                else:
+                    self._say(f"🟢 触发止盈: {risk.symbol} @ {risk.current_price:.2f} (止盈线: {risk.take_profit_price:.2f})")
+                    reasons.append("take_profit")
+                
+                sell_orders.append(dict(
+                    symbol=risk.symbol,
+                    side="sell",
+                    quantity=risk.quantity,
+                    price=risk.current_price,
+                    order_type="limit",
+                    skip_risk_check=True,  # 止损止盈不受风控限制
+                    set_stops=False,
+                    defer_record=True
+                ))
             
-            order["trigger"] = reason
-            order["pnl"] = risk.unrealized_pnl
-            executed_orders.append(order)
+            # 所有卖单并发提交，避免逐笔等待期间价格继续变化
+            for risk, reason, order in zip(exit_signals, reasons, self.submit_orders_bulk(sell_orders)):
+                order["trigger"] = reason
+                order["pnl"] = risk.unrealized_pnl
+                executed_orders.append(order)
+        finally:
+            # 止损止盈不做风控检查，交易记录整批写入；输出同样一次写出
+            self.flush_trades()
+            output, self._output = self._output, None
+            if output:
+                sys.stdout.write("\n".join(output) + "\n")
         
         return executed_orders
     
-    def get_risk_report(self) -> str:
-        """获取风险报告"""
-        account_balance = self.get_total_balance("USD")
-        positions = self.get_positions()
-        
-        # 获取报价
+    def _get_position_quotes(self, positions: list) -> dict:
+        """持仓最新价 {symbol: price}，QUOTE_CACHE_TTL 秒内的报价直接复用，只请求缺失的"""
+        now = time.monotonic()
         quotes = {}
-        if positions:
-            from .data import get_fetcher
-            fetcher = get_fetcher()
-            symbols = [p["symbol"] for p in positions]
-            quote_list = fetcher.get_quote_with_change(symbols)
-            quotes = {q["symbol"]: q["price"] for q in quote_list}
+        missing = []
+        for p in positions:
+            symbol = p["symbol"]
+            cached = self._quotes_cache.get(symbol)
+            if cached is not None and now - cached[1] < QUOTE_CACHE_TTL:
+                quotes[symbol] = cached[0]
+            else:
+                missing.append(symbol)
+        
+        if missing:
+            for q in get_fetcher().get_quote_with_change(missing):
+                quotes[q["symbol"]] = q["price"]
+                self._quotes_cache[q["symbol"]] = (q["price"], now)
+        return quotes
+    
+    def get_risk_report(self, snapshot: dict = None) -> str:
+        """
+        获取风险报告
+        
+        Args:
+            snapshot: get_account_snapshot(with_quotes=True) 的结果，传入时不再查询账户和报价
+        """
+        if snapshot is None:
+            snapshot = self.get_account_snapshot(with_quotes=True)
+        account_balance = snapshot["balance"]
+        positions = snapshot["positions"]
+        quotes = snapshot["quotes"]
         
         return self.risk.generate_risk_report(
             account_balance=account_balance,
@@ -416,7 +670,7 @@ class Trader:
 _trader = None
 
 
-def get_trader(dry_run: bool = False, risk_config: RiskConfig = None) -> Trader:
+def get_trader(dry_run: bool = False, risk_config: RiskConfig = None, verbose: bool = True) -> Trader:
     """
     获取交易器单例
     
@@ -425,8 +679,38 @@ def get_trader(dry_run: bool = False, risk_config: RiskConfig = None) -> Trader:
                  - False: 调用API（模拟盘会执行模拟交易）
                  - True: 不调用API，仅打印日志
         risk_config: 风控配置
+        verbose: 是否输出状态信息
     """
     global _trader
     if _trader is None:
-        _trader = Trader(dry_run=dry_run, risk_config=risk_config)
+        _trader = Trader(dry_run=dry_run, risk_config=risk_config, verbose=verbose)
     return _trader
+
+
+def prewarm(background: bool = True) -> Optional[threading.Thread]:
+    """
+    预先建立交易与行情连接 (加载配置、完成握手)，首次查询/下单不再承担建连耗时
+    
+    只预热进程内共用的连接，不创建交易器和风控单例，调用方之后仍可传入自己的配置。
+    失败时静默，实际使用时会再次尝试并报错。
+    
+    Args:
+        background: 在后台线程执行并返回该线程；首次使用交易器/行情前应先 join，
+                    避免与主线程同时创建连接
+    """
+    def warm():
+        try:
+            get_trade_context().account_balance()
+        except Exception:
+            pass
+        try:
+            get_fetcher().quote_ctx
+        except Exception:
+            pass
+    
+    if not background:
+        warm()
+        return None
+    thread = threading.Thread(target=warm, name="trader-prewarm", daemon=True)
+    thread.start()
+    return thread
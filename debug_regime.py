@@ -1,12 +1,15 @@
 from core.data import get_fetcher
 from core.regime import RegimeDetector
+import pandas as pd
 
 fetcher = get_fetcher()
 symbol = "MSFT.US"
 print(f"Fetching {symbol}...")
-df = fetcher.get_kline_df(symbol, days=200)
-print(f"Data length: {len(df) if df is not None else 'None'}")
-if df is not None and not df.empty:
+data = fetcher.get_kline_df(symbol, days=200)
+print(f"Data length: {len(data) if data is not None else 'None'}")
+if data:
+    # get_kline_df 返回字典列表，构建一次 DataFrame 供打印和分析共用
+    df = pd.DataFrame(data)
     print(df.tail())
     detector = RegimeDetector()
     regime = detector.analyze(symbol, df)
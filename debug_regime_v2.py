@@ -8,9 +8,10 @@ print(f"Fetching {symbol}...")
 data = fetcher.get_kline_df(symbol, days=200)
 
 if data:
+    # 只构建一次 DataFrame，RegimeDetector.analyze 直接复用
     df = pd.DataFrame(data)
-    print(f"Latest date: {df.iloc[-1]['date']}")
-    print(f"Latest price: {df.iloc[-1]['close']}")
+    print(f"Latest date: {df['date'].iat[-1]}")
+    print(f"Latest price: {df['close'].iat[-1]}")
     
     detector = RegimeDetector()
     regime = detector.analyze(symbol, df)
@@ -9,6 +9,7 @@
 """
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -22,6 +23,9 @@ from strategies.momentum import MomentumStrategy
 from strategies.base import Signal
 from config.watchlist import get_watchlist
 
+# scan_signals 并发拉取K线的最大线程数
+SCAN_MAX_WORKERS = 16
+
 
 def print_header():
     """打印头部"""
@@ -75,30 +79,35 @@ def scan_signals(symbols: list = None, strategy_name: str = "ma"):
     buy_signals = []
     sell_signals = []
     
-    for symbol in symbols:
+    def fetch_and_analyze(symbol):
+        """获取K线并生成信号，返回 (信号或None, 异常或None)"""
         try:
-            # 获取K线数据
             data = fetcher.get_kline_df(symbol, days=50)
-            
             if not data:
-                print(f"  ⚠️ {symbol}: 无数据")
-                continue
-            
-            # 生成信号
-            signal = strategy.analyze(symbol, data)
-            
-            if signal.signal == Signal.BUY:
-                buy_signals.append(signal)
-                print(f"  {signal}")
-            elif signal.signal == Signal.SELL:
-                sell_signals.append(signal)
-                print(f"  {signal}")
-            else:
-                # HOLD 信号只在 verbose 模式显示
-                pass
-                
+                return None, None
+            return strategy.analyze(symbol, data), None
         except Exception as e:
-            print(f"  ❌ {symbol}: {e}")
+            return None, e
+    
+    # K线请求并发发出，结果按原顺序在主线程输出
+    if len(symbols) > 1:
+        with ThreadPoolExecutor(max_workers=min(SCAN_MAX_WORKERS, len(symbols))) as executor:
+            results = list(executor.map(fetch_and_analyze, symbols))
+    else:
+        results = [fetch_and_analyze(symbol) for symbol in symbols]
+    
+    for symbol, (signal, error) in zip(symbols, results):
+        if error is not None:
+            print(f"  ❌ {symbol}: {error}")
+        elif signal is None:
+            print(f"  ⚠️ {symbol}: 无数据")
+        elif signal.signal == Signal.BUY:
+            buy_signals.append(signal)
+            print(f"  {signal}")
+        elif signal.signal == Signal.SELL:
+            sell_signals.append(signal)
+            print(f"  {signal}")
+        # HOLD 信号只在 verbose 模式显示
     
     # 汇总
     print("-" * 60)
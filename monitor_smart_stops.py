@@ -25,7 +25,7 @@
 import os
 import sys
 import argparse
-import json
+import random
 import time
 from datetime import datetime
 
@@ -40,8 +40,9 @@ from core.smart_stop import (
     StopDecision,
     SmartStopResult
 )
-from core.trader import get_trader
+from core.trader import get_trader, prewarm
 from core.risk import RiskConfig
+from core.jsonio import json_dumps, read_json_file
 
 
 def load_risk_config() -> RiskConfig:
@@ -61,21 +62,34 @@ def load_smart_stop_config() -> SmartStopConfig:
         "config",
         "smart_stop_config.json"
     )
-    if os.path.exists(config_path):
-        with open(config_path, "r") as f:
-            data = json.load(f)
-            return SmartStopConfig(**data)
+    data = read_json_file(config_path)
+    if data is not None:
+        return SmartStopConfig(**data)
     return SmartStopConfig()
 
 
-def retry_action(func, description: str, max_retries: int = 3, delay: int = 2):
-    """重试操作"""
+def retry_action(
+    func,
+    description: str,
+    max_retries: int = 3,
+    base_delay: float = 0.25,
+    max_delay: float = 4.0,
+    jitter: bool = True
+):
+    """
+    重试操作 (指数退避，默认加随机抖动，避免多个进程在同一时刻集中重试)
+    
+    只用于查询类操作；下单不可重试，否则可能重复成交
+    """
     for i in range(max_retries):
         try:
             return func()
         except Exception as e:
             if i < max_retries - 1:
-                print(f"⚠️ {description}失败: {e}，正在重试 ({i+1}/{max_retries})...")
+                delay = min(max_delay, base_delay * 2 ** i)
+                if jitter:
+                    delay *= random.uniform(0.5, 1.5)
+                print(f"⚠️ {description}失败: {e}，{delay:.2f}s 后重试 ({i+1}/{max_retries})...")
                 time.sleep(delay)
             else:
                 raise e
@@ -142,14 +156,18 @@ def monitor_and_execute(
     
     # 执行交易
     print(f"\n🔄 执行 {len(exit_results)} 笔止损/止盈...")
-    executed_orders = []
+    sell_orders = []
+    annotations = []
+    lines = []  # 各笔明细先攒起来，循环结束后一次输出
+    # 按代码索引持仓 (倒序构建，同一代码有多条时与逐条查找一样取第一条)
+    positions_by_symbol = {p["symbol"]: p for p in reversed(positions)}
     
     for result in exit_results:
         symbol = result.symbol
         current_price = result.details["current_price"]
         
         # 找到对应的持仓信息
-        pos = next((p for p in positions if p["symbol"] == symbol), None)
+        pos = positions_by_symbol.get(symbol)
         if not pos:
             continue
         
@@ -159,19 +177,20 @@ def monitor_and_execute(
         # 计算盈亏
         pnl = (current_price - cost_price) * quantity
         
-        trigger = "stop_loss" if result.final_decision == StopDecision.STOP_LOSS else "take_profit"
+        trigger = "stop_loss" if result.final_decision is StopDecision.STOP_LOSS else "take_profit"
         trigger_cn = "止损" if trigger == "stop_loss" else "止盈"
         emoji = "🔴" if trigger == "stop_loss" else "🟢"
         
-        print(f"\n{emoji} [{trigger_cn}] {symbol}")
-        print(f"   数量: {quantity} 股")
-        print(f"   成本: ${cost_price:.2f}")
-        print(f"   现价: ${current_price:.2f}")
-        print(f"   盈亏: ${pnl:+,.2f}")
-        print(f"   投票: {result.vote_summary}")
+        lines.append(
+            f"\n{emoji} [{trigger_cn}] {symbol}\n"
+            f"   数量: {quantity} 股\n"
+            f"   成本: ${cost_price:.2f}\n"
+            f"   现价: ${current_price:.2f}\n"
+            f"   盈亏: ${pnl:+,.2f}\n"
+            f"   投票: {result.vote_summary}"
+        )
         
-        # 执行卖出
-        order = trader.submit_order(
+        sell_orders.append(dict(
             symbol=symbol,
             side="sell",
             quantity=quantity,
@@ -179,15 +198,24 @@ def monitor_and_execute(
             order_type="limit",
             skip_risk_check=True,  # 止损止盈不受风控限制
             set_stops=False
-        )
-        
-        order["trigger"] = trigger
-        order["pnl"] = pnl
-        order["vote_summary"] = result.vote_summary
-        order["votes"] = [
-            {"strategy": v.strategy, "decision": v.decision.value, "reason": v.reason}
-            for v in result.votes
-        ]
+        ))
+        annotations.append({
+            "trigger": trigger,
+            "pnl": pnl,
+            "vote_summary": result.vote_summary,
+            "votes": [
+                {"strategy": v.strategy, "decision": v.decision.value, "reason": v.reason}
+                for v in result.votes
+            ],
+        })
+    
+    if lines:
+        print("\n".join(lines))
+    
+    # 执行卖出 (所有卖单并发提交)
+    executed_orders = []
+    for order, extra in zip(trader.submit_orders_bulk(sell_orders), annotations):
+        order.update(extra)
         executed_orders.append(order)
     
     # 发送通知
@@ -216,15 +244,15 @@ def send_notification(orders: list):
         )
     
     message = "\n".join(message_lines)
-    print(message)
     
-    # 输出特定格式供 OpenClaw 捕获
-    print("\n---NOTIFY---")
-    print(message)
-    print("---END NOTIFY---")
+    # 消息之后再输出一份特定格式供 OpenClaw 捕获
+    print(f"{message}\n\n---NOTIFY---\n{message}\n---END NOTIFY---")
 
 
 def main():
+    # 解析参数的同时在后台建立交易/行情连接
+    warming = prewarm()
+    
     parser = argparse.ArgumentParser(description="智能止损监控")
     parser.add_argument(
         "--report-only", "-r",
@@ -248,6 +276,7 @@ def main():
     )
     
     args = parser.parse_args()
+    warming.join()
     
     try:
         report, executed_orders = monitor_and_execute(
@@ -258,10 +287,12 @@ def main():
         )
         
         if args.json and executed_orders:
-            print(json.dumps({
+            # 直接写 UTF-8 字节 (优先 orjson)，先刷出文本缓冲保证输出顺序
+            sys.stdout.flush()
+            sys.stdout.buffer.write(json_dumps({
                 "executed_orders": executed_orders,
                 "count": len(executed_orders)
-            }, ensure_ascii=False, indent=2))
+            }, indent=True) + b"\n")
         
         print("\n" + "=" * 60)
         print("✅ 监控完成")
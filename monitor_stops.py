@@ -16,9 +16,14 @@
     
     # 检查后发送通知
     python monitor_stops.py --notify
+    
+    # 常驻运行：订阅持仓报价推送，价格触及止损/止盈线时立即平仓
+    python monitor_stops.py --daemon
 """
 import os
 import sys
+import time
+import queue
 import argparse
 from datetime import datetime
 
@@ -28,9 +33,18 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from dotenv import load_dotenv
 load_dotenv()
 
+from core.data import get_fetcher
 from core.trader import get_trader
 from core.risk import RiskConfig
 
+# 常驻模式: 持仓列表刷新间隔 (秒)，以及无法订阅推送时的报价轮询间隔 (秒)
+DAEMON_POSITIONS_REFRESH = 60.0
+DAEMON_POLL_INTERVAL = 5.0
+# 已提交的平仓单超过这么久 (秒) 持仓仍在时，不再等待，重新检查该股票的止损止盈线
+DAEMON_EXIT_TIMEOUT = 300.0
+# 平仓单处于这些状态时不会再成交，持仓 (或其剩余部分) 仍需监控
+_EXIT_DEAD_STATUSES = ("REJECTED", "CANCELED", "EXPIRED", "WITHDRAWAL")
+
 
 def load_risk_config() -> RiskConfig:
     """加载风控配置"""
@@ -52,8 +66,11 @@ def monitor_and_execute(notify: bool = False, report_only: bool = False):
     risk_config = load_risk_config()
     trader = get_trader(risk_config=risk_config)
     
+    # 账户与行情只查询一次，风险报告和止损检查共用
+    snapshot = trader.get_account_snapshot(with_quotes=True)
+    
     # 生成风险报告
-    report = trader.get_risk_report()
+    report = trader.get_risk_report(snapshot=snapshot)
     print(report)
     
     if report_only:
@@ -62,15 +79,10 @@ def monitor_and_execute(notify: bool = False, report_only: bool = False):
     
     # 检查并执行止损止盈
     print("\n🔄 检查止损止盈...")
-    executed_orders = trader.check_and_execute_stops()
+    executed_orders = trader.check_and_execute_stops(snapshot=snapshot)
     
     if executed_orders:
-        print(f"\n📊 执行了 {len(executed_orders)} 笔止损止盈:")
-        for order in executed_orders:
-            trigger = "止损" if order.get("trigger") == "stop_loss" else "止盈"
-            pnl = order.get("pnl", 0)
-            emoji = "🔴" if pnl < 0 else "🟢"
-            print(f"  {emoji} [{trigger}] {order['symbol']}: {order['quantity']}股 @ {order['price']:.2f}, 盈亏: {pnl:+.2f}")
+        print_executed_orders(executed_orders)
     else:
         print("✅ 无需执行止损止盈")
     
@@ -81,6 +93,134 @@ def monitor_and_execute(notify: bool = False, report_only: bool = False):
     return report, executed_orders
 
 
+def print_executed_orders(orders: list):
+    """输出已执行的止损止盈订单"""
+    lines = [f"\n📊 执行了 {len(orders)} 笔止损止盈:"]
+    for order in orders:
+        trigger = "止损" if order.get("trigger") == "stop_loss" else "止盈"
+        pnl = order.get("pnl", 0)
+        emoji = "🔴" if pnl < 0 else "🟢"
+        lines.append(f"  {emoji} [{trigger}] {order['symbol']}: {order['quantity']}股 @ {order['price']:.2f}, 盈亏: {pnl:+.2f}")
+    print("\n".join(lines))
+
+
+def run_daemon(notify: bool = False):
+    """
+    常驻监控: 订阅持仓报价推送，每次推送后用本地持仓和最新价检查止损止盈
+    
+    只有价格触及止损/止盈线时才会调用下单接口；持仓列表每 DAEMON_POSITIONS_REFRESH 秒
+    或平仓后刷新一次，并同步增减订阅。行情不支持推送时 (Mock 模式) 改为定时轮询报价。
+    已提交平仓的股票在持仓消失前不再重复下单；平仓单被拒绝/撤销/过期，
+    或超过 DAEMON_EXIT_TIMEOUT 秒仍未成交时重新检查。
+    """
+    print("=" * 60)
+    print(f"🛰️ 止损止盈常驻监控 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("=" * 60)
+    
+    trader = get_trader(risk_config=load_risk_config())
+    fetcher = get_fetcher()
+    
+    updates = queue.Queue()  # 推送线程 -> 主线程: (symbol, price)
+    prices = {}
+    exiting = {}  # 已提交平仓、等待持仓消失的股票 -> (订单号, 提交时间)
+    
+    positions = trader.get_positions(use_cache=False)
+    symbols = {p["symbol"] for p in positions}
+    
+    def on_price(symbol, price):
+        updates.put((symbol, price))
+    
+    streaming = fetcher.subscribe_quotes(sorted(symbols), on_price)
+    mode = "报价推送" if streaming else f"每 {DAEMON_POLL_INTERVAL:.0f}s 轮询报价"
+    print(f"📋 持仓 {len(symbols)} 只，{mode}；Ctrl+C 退出")
+    
+    next_refresh = time.monotonic() + DAEMON_POSITIONS_REFRESH
+    try:
+        while True:
+            if streaming:
+                try:
+                    symbol, price = updates.get(timeout=1.0)
+                except queue.Empty:
+                    changed = False
+                else:
+                    prices[symbol] = price
+                    # 一次取完已到达的推送，合并为一次检查
+                    while True:
+                        try:
+                            symbol, price = updates.get_nowait()
+                        except queue.Empty:
+                            break
+                        prices[symbol] = price
+                    changed = True
+            else:
+                time.sleep(DAEMON_POLL_INTERVAL)
+                changed = bool(symbols)
+            
+            try:
+                if changed and not streaming:
+                    prices.update((q["symbol"], q["price"]) for q in fetcher.get_quote_with_change(sorted(symbols)))
+                
+                executed_orders = []
+                active = [p for p in positions if p["symbol"] not in exiting]
+                if changed and active:
+                    executed_orders = trader.check_and_execute_stops(quotes=prices, snapshot={"positions": active})
+                
+                if executed_orders:
+                    print_executed_orders(executed_orders)
+                    submitted_at = time.monotonic()
+                    for o in executed_orders:
+                        if o.get("status") in ("SUBMITTED", "DRY_RUN"):
+                            exiting[o["symbol"]] = (o.get("order_id"), submitted_at)
+                    if notify:
+                        send_notification(executed_orders)
+                
+                if executed_orders or time.monotonic() >= next_refresh:
+                    positions = trader.get_positions(use_cache=False)
+                    held = {p["symbol"] for p in positions}
+                    exiting = {s: entry for s, entry in exiting.items() if s in held}
+                    for symbol in expire_exits(trader, exiting):
+                        print(f"🔁 {symbol} 平仓单未成交，重新监控止损止盈")
+                    if streaming:
+                        fetcher.unsubscribe_quotes(sorted(symbols - held))
+                        fetcher.subscribe_quotes(sorted(held - symbols), on_price)
+                    for symbol in symbols - held:
+                        prices.pop(symbol, None)
+                    symbols = held
+                    next_refresh = time.monotonic() + DAEMON_POSITIONS_REFRESH
+            except Exception as e:
+                # 单次检查失败不退出，下一次推送/轮询时重试
+                print(f"⚠️ 检查止损止盈失败: {e}")
+    except KeyboardInterrupt:
+        print("\n👋 停止常驻监控")
+    finally:
+        if streaming:
+            fetcher.unsubscribe_quotes(sorted(symbols))
+
+
+def expire_exits(trader, exiting: dict) -> list:
+    """
+    把不会再成交的平仓记录移出 exiting (原地修改)，返回被移出的股票
+    
+    超过 DAEMON_EXIT_TIMEOUT 秒的直接移出；有订单号的再查一次今日订单，
+    已被拒绝/撤销/过期的移出。
+    """
+    now = time.monotonic()
+    expired = [s for s, (_, submitted_at) in exiting.items() if now - submitted_at >= DAEMON_EXIT_TIMEOUT]
+    pending = {order_id: s for s, (order_id, _) in exiting.items() if order_id and s not in expired}
+    if pending:
+        try:
+            for order in trader.get_today_orders():
+                symbol = pending.get(order.order_id)
+                status = str(order.status).upper()
+                if symbol and any(dead in status for dead in _EXIT_DEAD_STATUSES):
+                    expired.append(symbol)
+        except Exception as e:
+            print(f"⚠️ 查询平仓订单状态失败: {e}")
+    for symbol in expired:
+        del exiting[symbol]
+    return expired
+
+
 def send_notification(orders: list):
     """发送通知（可扩展为 Telegram/Email 等）"""
     print("\n📤 发送通知...")
@@ -123,9 +263,18 @@ def main():
         action="store_true",
         help="输出 JSON 格式（供程序解析）"
     )
+    parser.add_argument(
+        "--daemon", "-d",
+        action="store_true",
+        help="常驻运行，订阅报价推送并实时检查止损止盈"
+    )
     
     args = parser.parse_args()
     
+    if args.daemon:
+        run_daemon(notify=args.notify)
+        return
+    
     try:
         result = monitor_and_execute(
             notify=args.notify,
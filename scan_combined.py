@@ -13,6 +13,7 @@
 """
 import os
 import sys
+import argparse
 from datetime import datetime
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -27,10 +28,16 @@ from strategies.regime_switching import RegimeSwitchingStrategy
 from strategies.base import Signal
 from config.watchlist import get_watchlist
 
+# 并发拉取K线的默认线程数
+DEFAULT_WORKERS = 16
 
-def scan_combined(category: str = "all", top_n: int = 30):
+
+def scan_combined(category: str = "all", top_n: int = 30, workers: int = DEFAULT_WORKERS):
     """
     组合策略扫描
+    
+    Args:
+        workers: 并发拉取K线的线程数 (1 为逐只串行)
     """
     print("=" * 70)
     print(f"🎯 组合策略扫描 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -82,9 +89,19 @@ def scan_combined(category: str = "all", top_n: int = 30):
     buy_signals = []
     sell_signals = []
     
+    # 所有标的的K线一次批量获取 (请求并发发出)，之后按股票池顺序逐只分析
+    kline_errors = {}
+    klines = fetcher.get_kline_df_batch(
+        symbols, days=150, max_workers=workers, errors=kline_errors  # 增加天数以确保 EMA50 计算准确
+    )
+    
     for symbol in symbols:
+        if symbol in kline_errors:
+            print(f"Error scanning {symbol}: {kline_errors[symbol]}")
+            continue
+        
         try:
-            data = fetcher.get_kline_df(symbol, days=150) # 增加天数以确保 EMA50 计算准确
+            data = klines[symbol]
             if not data or len(data) < 60:
                 continue
             
@@ -200,4 +217,13 @@ def scan_combined(category: str = "all", top_n: int = 30):
     print("=" * 70)
 
 if __name__ == "__main__":
-    scan_combined()
+    parser = argparse.ArgumentParser(description="组合策略扫描")
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"并发拉取K线的线程数 (默认 {DEFAULT_WORKERS}，1 为串行)"
+    )
+    args = parser.parse_args()
+    
+    scan_combined(workers=args.workers)
@@ -17,6 +17,9 @@
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
+
+import numpy as np
+
 from .base import BaseStrategy, TradeSignal, Signal
 
 
@@ -158,53 +161,48 @@ class SmallCapGrowthStrategy(BaseStrategy):
         """
         cfg = self.config.growth_filter
         
-        # 收集所有有效的财务数据
+        # 收集所有有效的财务数据 (原始行 + 两列数值)
         valid_stocks = []
         rev_values = []
         profit_values = []
         
         for stock in stocks:
-            symbol = stock.get("symbol")
-            fin = financial_data.get(symbol, {})
+            fin = financial_data.get(stock.get("symbol"), {})
             
             rev_yoy = fin.get("rev_yoy")
             profit_yoy = fin.get("profit_yoy")
             
             if rev_yoy is not None and profit_yoy is not None:
-                valid_stocks.append({
-                    **stock,
-                    "rev_yoy": rev_yoy,
-                    "profit_yoy": profit_yoy
-                })
+                valid_stocks.append(stock)
                 rev_values.append(rev_yoy)
                 profit_values.append(profit_yoy)
         
         if not valid_stocks:
             return []
         
+        rev = np.asarray(rev_values, dtype=np.float64)
+        profit = np.asarray(profit_values, dtype=np.float64)
+        n = len(valid_stocks)
+        
         # 计算阈值
         if cfg.use_relative_rank:
-            # 使用相对排名（中位数）
-            rev_values.sort()
-            profit_values.sort()
+            # 使用相对排名（中位数）：取升序第 idx 个值，partition 不需要整列排序
+            rev_idx = min(int(n * (1 - cfg.revenue_percentile)), n - 1)
+            profit_idx = min(int(n * (1 - cfg.profit_percentile)), n - 1)
             
-            rev_idx = int(len(rev_values) * (1 - cfg.revenue_percentile))
-            profit_idx = int(len(profit_values) * (1 - cfg.profit_percentile))
-            
-            rev_threshold = rev_values[rev_idx] if rev_idx < len(rev_values) else rev_values[-1]
-            profit_threshold = profit_values[profit_idx] if profit_idx < len(profit_values) else profit_values[-1]
+            rev_threshold = np.partition(rev, rev_idx)[rev_idx]
+            profit_threshold = np.partition(profit, profit_idx)[profit_idx]
         else:
             # 使用固定阈值
             rev_threshold = cfg.min_revenue_yoy or 0
             profit_threshold = cfg.min_profit_yoy or 0
         
-        # 筛选高于阈值的股票
-        filtered = [
-            s for s in valid_stocks
-            if s["rev_yoy"] >= rev_threshold and s["profit_yoy"] >= profit_threshold
+        # 筛选高于阈值的股票，只为入选的股票构建结果
+        keep = np.flatnonzero((rev >= rev_threshold) & (profit >= profit_threshold))
+        return [
+            {**valid_stocks[i], "rev_yoy": rev_values[i], "profit_yoy": profit_values[i]}
+            for i in keep.tolist()
         ]
-        
-        return filtered
     
     def rank_by_market_cap(
         self, 
@@ -228,41 +226,46 @@ class SmallCapGrowthStrategy(BaseStrategy):
             按市值排序并筛选后的股票列表
         """
         cfg = self.config
+        cap_key = "float_value" if cfg.use_float_value else "total_value"
         
-        # 添加市值数据
-        stocks_with_cap = []
+        # 收集有市值数据的股票
+        candidates = []
+        caps = []
         for stock in stocks:
-            symbol = stock.get("symbol")
-            mkt = market_data.get(symbol, {})
-            
-            if cfg.use_float_value:
-                market_cap = mkt.get("float_value")
-            else:
-                market_cap = mkt.get("total_value")
-            
+            market_cap = market_data.get(stock.get("symbol"), {}).get(cap_key)
             if market_cap is None:
                 continue
-            
-            # 转换为亿元
-            market_cap_yi = market_cap / 100000000 if market_cap > 10000 else market_cap
-            
-            # 市值范围过滤
-            if cfg.max_market_cap and market_cap_yi > cfg.max_market_cap:
-                continue
-            if cfg.min_market_cap and market_cap_yi < cfg.min_market_cap:
-                continue
-            
-            stocks_with_cap.append({
-                **stock,
-                "market_cap": market_cap,
-                "market_cap_yi": market_cap_yi
-            })
+            candidates.append(stock)
+            caps.append(market_cap)
+        
+        if not candidates:
+            return []
+        
+        cap = np.asarray(caps, dtype=np.float64)
         
-        # 按市值从小到大排序
-        stocks_with_cap.sort(key=lambda x: x["market_cap"])
+        # 转换为亿元
+        cap_yi = np.where(cap > 10000, cap / 100000000, cap)
         
-        # 选前 N 只
-        return stocks_with_cap[:cfg.top_n]
+        # 市值范围过滤
+        mask = np.ones(len(cap), dtype=bool)
+        if cfg.max_market_cap:
+            mask &= cap_yi <= cfg.max_market_cap
+        if cfg.min_market_cap:
+            mask &= cap_yi >= cfg.min_market_cap
+        idx = np.flatnonzero(mask)
+        
+        # 按市值从小到大排序 (稳定排序，市值相同时保持原顺序)，选前 N 只
+        top = idx[np.argsort(cap[idx], kind="stable")][:cfg.top_n]
+        
+        selected = []
+        for i in top.tolist():
+            market_cap = caps[i]
+            selected.append({
+                **candidates[i],
+                "market_cap": market_cap,
+                "market_cap_yi": market_cap / 100000000 if market_cap > 10000 else market_cap
+            })
+        return selected
     
     def select_stocks(
         self,
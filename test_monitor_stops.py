@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+止损止盈常驻监控单元测试 (轮询模式，不连接券商)
+"""
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import monitor_stops
+
+
+STOP_PRICE = 60.0
+
+
+class FakeFetcher:
+    """不支持推送的行情源，按 ticks 依次返回每轮的报价，用完后结束监控"""
+    
+    def __init__(self, ticks):
+        self.ticks = ticks
+        self.polls = 0
+    
+    def subscribe_quotes(self, symbols, on_price):
+        return False
+    
+    def unsubscribe_quotes(self, symbols):
+        pass
+    
+    def get_quote_with_change(self, symbols):
+        if self.polls >= len(self.ticks):
+            raise KeyboardInterrupt
+        prices = self.ticks[self.polls]
+        self.polls += 1
+        return [{"symbol": s, "price": prices.get(s, 100.0), "change_pct": 0.0} for s in symbols]
+
+
+class FakeTrader:
+    """价格低于 STOP_PRICE 的持仓提交止损卖单，记录每次卖出"""
+    
+    def __init__(self, positions):
+        self.positions = positions
+        self.sells = []
+        self.order_status = {}  # order_id -> 状态
+    
+    def get_positions(self, use_cache=True):
+        return list(self.positions)
+    
+    def get_today_orders(self):
+        return [SimpleNamespace(order_id=oid, status=status) for oid, status in self.order_status.items()]
+    
+    def check_and_execute_stops(self, quotes=None, snapshot=None):
+        orders = []
+        for pos in snapshot["positions"]:
+            price = quotes.get(pos["symbol"], 0)
+            if 0 < price < STOP_PRICE:
+                order_id = f"O{len(self.sells) + 1}"
+                self.sells.append(pos["symbol"])
+                self.order_status[order_id] = "OrderStatus.New"
+                orders.append({"symbol": pos["symbol"], "quantity": 10, "price": price, "status": "SUBMITTED",
+                               "order_id": order_id, "trigger": "stop_loss", "pnl": -100.0})
+        return orders
+
+
+class TestDaemonPollLoop(unittest.TestCase):
+    """测试常驻监控的轮询循环"""
+    
+    def run_daemon(self, trader, fetcher):
+        with mock.patch.object(monitor_stops, "get_trader", return_value=trader), \
+             mock.patch.object(monitor_stops, "get_fetcher", return_value=fetcher), \
+             mock.patch.object(monitor_stops, "DAEMON_POLL_INTERVAL", 0), \
+             mock.patch.object(monitor_stops, "DAEMON_POSITIONS_REFRESH", 0.0):
+            monitor_stops.run_daemon()
+    
+    def test_exit_once(self):
+        """测试持仓未消失前不重复下单"""
+        trader = FakeTrader([{"symbol": "A.US"}, {"symbol": "B.US"}])
+        fetcher = FakeFetcher([{}, {"A.US": 50.0}, {"A.US": 49.0}, {"A.US": 48.0}])
+        self.run_daemon(trader, fetcher)
+        
+        self.assertEqual(trader.sells, ["A.US"])
+        print("✅ 平仓只提交一次")
+    
+    def test_rearm_after_position_reopened(self):
+        """测试持仓消失后再次买入，重新检查止损"""
+        trader = FakeTrader([{"symbol": "A.US"}, {"symbol": "B.US"}])
+        fetcher = FakeFetcher([{"A.US": 50.0}, {"A.US": 50.0}, {"A.US": 50.0}])
+        
+        original = trader.check_and_execute_stops
+        def check(quotes=None, snapshot=None):
+            orders = original(quotes, snapshot)
+            # 第一次轮询后平仓成交、持仓消失；第二次轮询后重新买入
+            if fetcher.polls == 1:
+                trader.positions = [{"symbol": "B.US"}]
+            else:
+                trader.positions = [{"symbol": "A.US"}, {"symbol": "B.US"}]
+            return orders
+        trader.check_and_execute_stops = check
+        self.run_daemon(trader, fetcher)
+        
+        self.assertEqual(trader.sells, ["A.US", "A.US"])
+        print("✅ 重新持仓后恢复监控")
+    
+    def test_rearm_after_rejected(self):
+        """测试平仓单被拒绝后重新检查止损"""
+        trader = FakeTrader([{"symbol": "A.US"}])
+        fetcher = FakeFetcher([{"A.US": 50.0}, {"A.US": 50.0}, {"A.US": 50.0}, {"A.US": 50.0}])
+        
+        original = fetcher.get_quote_with_change
+        def poll(symbols):
+            if fetcher.polls == 2:
+                trader.order_status["O1"] = "OrderStatus.Rejected"
+            return original(symbols)
+        fetcher.get_quote_with_change = poll
+        self.run_daemon(trader, fetcher)
+        
+        self.assertEqual(trader.sells, ["A.US", "A.US"])
+        print("✅ 平仓单被拒绝后恢复监控")
+    
+    def test_rearm_after_timeout(self):
+        """测试平仓单超时未成交后重新检查止损"""
+        trader = FakeTrader([{"symbol": "A.US"}])
+        fetcher = FakeFetcher([{"A.US": 50.0}, {"A.US": 50.0}])
+        with mock.patch.object(monitor_stops, "DAEMON_EXIT_TIMEOUT", 0.0):
+            self.run_daemon(trader, fetcher)
+        
+        self.assertEqual(trader.sells, ["A.US", "A.US"])
+        print("✅ 平仓单超时后恢复监控")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+智能止损单元测试
+"""
+import unittest
+
+from core.smart_stop import SmartStopManager
+
+
+def make_candles(n=120, base=10.0):
+    """生成 n 根平稳上涨的日K线"""
+    candles = []
+    for i in range(n):
+        close = base + i * 0.01
+        candles.append({"open": close, "high": close + 0.2, "low": close - 0.2, "close": close, "volume": 1000})
+    return candles
+
+
+class FakeFetcher:
+    """记录调用次数的数据源"""
+    
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.single_calls = []
+        self.batch_calls = []
+    
+    def get_kline_df(self, symbol, days=100):
+        self.single_calls.append(symbol)
+        return make_candles(days)
+    
+    def get_kline_df_batch(self, symbols, days=100, max_workers=16, errors=None):
+        self.batch_calls.append(list(symbols))
+        return {s: make_candles(days) for s in symbols if s not in self.failing}
+    
+    def get_quote_with_change(self, symbols):
+        return [{"symbol": s, "price": 11.0, "change_pct": 0.0} for s in symbols]
+
+
+class TestPrefetchCandles(unittest.TestCase):
+    """测试扫描持仓时批量预取K线"""
+    
+    def setUp(self):
+        self.positions = [{"symbol": f"S{i}.US", "cost_price": 10.5} for i in range(5)]
+        self.quotes = {p["symbol"]: 11.0 for p in self.positions}
+    
+    def test_scan_uses_batch(self):
+        """测试 scan_positions 一次批量请求全部持仓，不再逐只请求"""
+        fetcher = FakeFetcher()
+        manager = SmartStopManager(data_fetcher=fetcher)
+        results = manager.scan_positions(self.positions, self.quotes)
+        
+        self.assertEqual(len(results), 5)
+        self.assertEqual(len(fetcher.batch_calls), 1)
+        self.assertEqual(sorted(fetcher.batch_calls[0]), sorted(self.quotes))
+        self.assertEqual(fetcher.single_calls, [])
+        self.assertTrue(all(r.details["volatility"] > 0 for r in results))
+        print("✅ 批量预取K线正常")
+    
+    def test_cached_symbols_not_refetched(self):
+        """测试缓存命中的持仓不再进入批量请求"""
+        fetcher = FakeFetcher()
+        manager = SmartStopManager(data_fetcher=fetcher)
+        manager.scan_positions(self.positions, self.quotes)
+        manager.scan_positions(self.positions, self.quotes)
+        
+        self.assertEqual(len(fetcher.batch_calls), 1)
+        print("✅ 缓存命中跳过批量请求正常")
+    
+    def test_failed_symbols_fall_back(self):
+        """测试批量中获取失败的标的回退到逐只请求"""
+        fetcher = FakeFetcher(failing={"S3.US"})
+        manager = SmartStopManager(data_fetcher=fetcher)
+        manager.scan_positions(self.positions, self.quotes)
+        
+        self.assertEqual(fetcher.single_calls, ["S3.US"])
+        print("✅ 批量失败回退正常")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)